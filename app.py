@@ -1,12 +1,29 @@
+import logging
 import os
+from functools import lru_cache
 from flask import Flask, send_from_directory, request
 from flask_cors import CORS
-from models import db
+from sqlalchemy import event
+from werkzeug.utils import safe_join
+from app_common import ORJSONProvider, engine_options, set_sqlite_pragmas
+from models import db, add_missing_columns, create_missing_indexes, populate_challenge_stats
 from routes.users import users_bp
 from routes.challenges import challenges_bp
 from routes.trades import trades_bp
-from routes.real_time_data import real_time_data_bp
-from routes.ai_signals import ai_signals_bp
+
+# INFO by default; LOG_LEVEL=DEBUG turns on the per-trade P&L and status-check logs
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+logger = logging.getLogger(__name__)
+
+
+# React production build served by the catch-all route
+BUILD_FOLDER = os.path.join(os.path.dirname(__file__), 'frontend', 'build')
+
+
+@lru_cache(maxsize=4096)
+def is_build_file(full_path):
+    """Cached isfile check; the build only changes on deploy, when workers restart"""
+    return os.path.isfile(full_path)
 
 
 def create_app():
@@ -18,33 +35,50 @@ def create_app():
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URL)
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+    app.json = ORJSONProvider(app)
 
     # Initialize extensions
     db.init_app(app)
     # Configure CORS - allow all origins during development, restrict in production
+    # (comma-separated list, e.g. "https://app.example.com,https://admin.example.com")
     cors_origins = os.environ.get('CORS_ORIGINS', '*')
-    CORS(app, resources={r"/*": {"origins": cors_origins}}, supports_credentials=True)
+    if cors_origins != '*':
+        cors_origins = [origin.strip() for origin in cors_origins.split(',') if origin.strip()]
+    # Let browsers cache preflight responses for 24h instead of sending OPTIONS before every call
+    # X-Status-Pending (trade responses) must be exposed for cross-origin frontends to read it
+    CORS(app, resources={r"/*": {"origins": cors_origins, "max_age": 86400, "expose_headers": ["X-Status-Pending"]}},
+         supports_credentials=True)
     
     # Register blueprints
     app.register_blueprint(users_bp)
     app.register_blueprint(challenges_bp)
     app.register_blueprint(trades_bp)
-    app.register_blueprint(real_time_data_bp)
-    app.register_blueprint(ai_signals_bp)
+    
+    # Market data blueprints pull in yfinance/pandas/apscheduler, so import them
+    # only when enabled (ENABLE_REALTIME=0 skips them)
+    if os.environ.get('ENABLE_REALTIME', '1') == '1':
+        try:
+            from routes.real_time_data import real_time_data_bp
+            from routes.ai_signals import ai_signals_bp
+            
+            app.register_blueprint(real_time_data_bp)
+            app.register_blueprint(ai_signals_bp)
+        except ImportError as e:
+            logger.error("Error importing real-time blueprints: %s", e)
     
     # Serve React App (catch-all route)
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_react_app(path=''):
-        build_folder = os.path.join(os.path.dirname(__file__), 'frontend', 'build')
-        
-        # If it's a specific file that exists, serve it
-        if path and os.path.exists(os.path.join(build_folder, path)):
-            return send_from_directory(build_folder, path)
+        # If it's a specific file that exists, serve it (safe_join rejects paths escaping the build)
+        full_path = safe_join(BUILD_FOLDER, path) if path else None
+        if full_path and is_build_file(full_path):
+            return send_from_directory(BUILD_FOLDER, path)
         
         # Otherwise serve the React app (index.html)
-        return send_from_directory(build_folder, 'index.html')
+        return send_from_directory(BUILD_FOLDER, 'index.html')
     
     # Simple API health check
     @app.route('/api/health')
@@ -57,21 +91,16 @@ def create_app():
         build_folder = os.path.join(os.path.dirname(__file__), 'frontend', 'build')
         return send_from_directory(os.path.join(build_folder, 'static'), filename)
     
-    # Serve React App for frontend routes
-    @app.route('/<path:path>')
-    def serve(path):
-        build_folder = os.path.join(os.path.dirname(__file__), 'frontend', 'build')
-        # Don't serve index.html for static files or API routes
-        if path.startswith('static/') or path.startswith('api/'):
-            return send_from_directory(build_folder, path)
-        elif path != "" and os.path.exists(os.path.join(build_folder, path)):
-            return send_from_directory(build_folder, path)
-        else:
-            return send_from_directory(build_folder, 'index.html')
-    
     # Create tables
     with app.app_context():
+        if DATABASE_URL.startswith('sqlite'):
+            event.listen(db.engine, 'connect', set_sqlite_pragmas)
         db.create_all()
+        add_missing_columns()
+        create_missing_indexes()
+        populate_challenge_stats()
+        # Don't hand connections opened here to forked Gunicorn workers (preload_app)
+        db.engine.dispose()
     
     return app
 
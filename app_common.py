@@ -0,0 +1,48 @@
+"""
+Setup shared by the root app (app.py) and the backend app (backend/app.py)
+"""
+import os
+from flask.json.provider import DefaultJSONProvider
+import orjson
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Serialize responses with orjson (handles datetime and numpy values natively)"""
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        # Types orjson doesn't know (Decimal, UUID, ...) go through Flask's default handler
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def engine_options(database_url):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for database_url; server databases get a pool sized
+    for gevent workers (DB_POOL_SIZE / DB_MAX_OVERFLOW) so greenlets don't queue on checkout
+    """
+    if database_url.startswith('sqlite'):
+        return {'connect_args': {'check_same_thread': False}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 40)),
+        'pool_pre_ping': True,  # Survive database restarts
+        'pool_recycle': 1800,  # Recycle before server-side idle timeouts
+        'pool_timeout': 30
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL and relaxed fsync so SQLite readers don't block the writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    cursor.execute('PRAGMA cache_size=-64000')  # 64 MB
+    cursor.close()
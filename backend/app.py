@@ -1,37 +1,49 @@
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS
+from sqlalchemy import event
+from app_common import ORJSONProvider, set_sqlite_pragmas
 from config import Config
-from models import db
+from models import db, create_missing_indexes
 
 # Extensions are imported from models module
 # db is defined in models.py
 
+
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = ORJSONProvider(app)
     
     # Initialize extensions with app
     db.init_app(app)
-    CORS(app)  # Enable CORS for all routes
+    CORS(app)  # Enable CORS for all routes (origins/max_age come from Config)
     
     # Import and register blueprints
     try:
         from routes.users import users_bp
         from routes.challenges import challenges_bp
         from routes.trades import trades_bp
-        from routes.real_time_data import real_time_data_bp
         from routes.leaderboard import leaderboard_bp
         from routes.admin import admin_bp
         
         app.register_blueprint(users_bp)
         app.register_blueprint(challenges_bp)
         app.register_blueprint(trades_bp)
-        app.register_blueprint(real_time_data_bp)
         app.register_blueprint(leaderboard_bp)
         app.register_blueprint(admin_bp)
     except ImportError as e:
         print(f"Error importing blueprints: {e}")
     
+    # The market data blueprint pulls in yfinance/pandas/apscheduler, so import it
+    # only when enabled (ENABLE_REALTIME=0 skips it)
+    if os.environ.get('ENABLE_REALTIME', '1') == '1':
+        try:
+            from routes.real_time_data import real_time_data_bp
+            app.register_blueprint(real_time_data_bp)
+        except ImportError as e:
+            print(f"Error importing real-time blueprint: {e}")
+    
     # Test route
     @app.route('/')
     def home():
@@ -42,10 +54,16 @@ def create_app():
     
     # Create tables
     with app.app_context():
+        if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+            event.listen(db.engine, 'connect', set_sqlite_pragmas)
         db.create_all()
+        create_missing_indexes()
+        # Don't hand connections opened here to forked Gunicorn workers (preload_app)
+        db.engine.dispose()
     
     return app
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Debug mode only when explicitly requested; production runs under Gunicorn
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,6 +1,11 @@
 import os
+from app_common import engine_options
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'tradesense-secret-key-dev-mode'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///database.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Flask-CORS reads CORS_* settings from the app config
+    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
+    CORS_MAX_AGE = 86400  # Cache preflight responses for 24h
@@ -1,8 +1,30 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
-db = SQLAlchemy()
+try:
+    import gevent
+    from gevent import monkey
+except ImportError:
+    gevent = None
+
+# Keep loaded attributes after commit: routes serialize the objects they just
+# committed, which would otherwise trigger a refresh SELECT per object
+db = SQLAlchemy(session_options={'expire_on_commit': False})
+
+# Werkzeug hash method for new passwords, e.g. "scrypt" or "pbkdf2:sha256:600000"
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2')
+
+
+def run_cpu_bound(func, *args):
+    """
+    Run CPU-heavy work (password hashing) on gevent's native thread pool when the
+    server is monkey-patched, so other greenlets keep running; otherwise call directly
+    """
+    if gevent is not None and monkey.is_module_patched('threading'):
+        return gevent.get_hub().threadpool.apply(func, args)
+    return func(*args)
 
 
 class User(db.Model):
@@ -17,10 +39,10 @@ class User(db.Model):
     challenges = db.relationship('UserChallenge', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = run_cpu_bound(generate_password_hash, password, PASSWORD_HASH_METHOD)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return run_cpu_bound(check_password_hash, self.password_hash, password)
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -41,6 +63,14 @@ class UserChallenge(db.Model):
     profit_target = db.Column(db.Float, default=10.0, nullable=False)  # Profit target percentage to win challenge
     challenge_type = db.Column(db.String(50), default='standard', nullable=False)  # standard, advanced, etc.
     
+    # Leaderboard filters on status and ranks by balances; per-user lookups filter on (user_id, status).
+    # The CHECK rejects unknown statuses at the database (applies to newly created tables)
+    __table_args__ = (
+        db.Index('ix_user_challenges_status_balances', 'status', 'current_balance', 'initial_balance'),
+        db.Index('ix_user_challenges_user_status', 'user_id', 'status'),
+        db.CheckConstraint("status IN ('active', 'failed', 'funded')", name='ck_user_challenges_status'),
+    )
+    
     # Relationship with Trade
     trades = db.relationship('Trade', backref='challenge', lazy=True)
     
@@ -59,4 +89,17 @@ class Trade(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Trade {self.asset_name} - {self.type}>'
\ No newline at end of file
+        return f'<Trade {self.asset_name} - {self.type}>'
+
+
+# Serves a challenge's trades newest-first without a sort, and the leaderboard join on challenge_id
+db.Index('ix_trades_challenge_timestamp', Trade.challenge_id, Trade.timestamp.desc())
+
+
+def create_missing_indexes():
+    """
+    Create model indexes that db.create_all() skips on tables that already exist
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
@@ -1,4 +1,6 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from backend.models import db, User, UserChallenge
 
 challenges_bp = Blueprint('challenges', __name__)
@@ -66,7 +68,8 @@ def create_challenge():
 @challenges_bp.route('/challenge/<int:challenge_id>', methods=['GET'])
 def get_challenge(challenge_id):
     try:
-        challenge = UserChallenge.query.get(challenge_id)
+        # Load the trades with one extra IN query instead of a lazy load on access
+        challenge = UserChallenge.query.options(selectinload(UserChallenge.trades)).get(challenge_id)
         
         if not challenge:
             return jsonify({'error': 'Challenge not found'}), 404
@@ -79,7 +82,7 @@ def get_challenge(challenge_id):
                 'asset_name': trade.asset_name,
                 'entry_price': trade.entry_price,
                 'type': trade.type,
-                'timestamp': trade.timestamp.isoformat()
+                'timestamp': trade.timestamp
             })
         
         return jsonify({
@@ -88,8 +91,8 @@ def get_challenge(challenge_id):
             'initial_balance': challenge.initial_balance,
             'current_balance': challenge.current_balance,
             'status': challenge.status,
-            'start_date': challenge.start_date.isoformat(),
-            'end_date': challenge.end_date.isoformat() if challenge.end_date else None,
+            'start_date': challenge.start_date,
+            'end_date': challenge.end_date,
             'max_daily_loss': challenge.max_daily_loss,
             'max_total_loss': challenge.max_total_loss,
             'profit_target': challenge.profit_target,
@@ -136,21 +139,35 @@ def update_challenge_balance(challenge_id):
 @challenges_bp.route('/user/<int:user_id>/challenges', methods=['GET'])
 def get_user_challenges(user_id):
     try:
-        challenges = UserChallenge.query.filter_by(user_id=user_id).all()
+        # Select plain columns so rows skip ORM instance construction
+        rows = db.session.execute(
+            select(
+                UserChallenge.id,
+                UserChallenge.initial_balance,
+                UserChallenge.current_balance,
+                UserChallenge.status,
+                UserChallenge.start_date,
+                UserChallenge.end_date,
+                UserChallenge.max_daily_loss,
+                UserChallenge.max_total_loss,
+                UserChallenge.profit_target,
+                UserChallenge.challenge_type
+            ).filter_by(user_id=user_id).execution_options(yield_per=500)
+        )
         
         challenges_list = []
-        for challenge in challenges:
+        for row in rows:
             challenges_list.append({
-                'challenge_id': challenge.id,
-                'initial_balance': challenge.initial_balance,
-                'current_balance': challenge.current_balance,
-                'status': challenge.status,
-                'start_date': challenge.start_date.isoformat(),
-                'end_date': challenge.end_date.isoformat() if challenge.end_date else None,
-                'max_daily_loss': challenge.max_daily_loss,
-                'max_total_loss': challenge.max_total_loss,
-                'profit_target': challenge.profit_target,
-                'challenge_type': challenge.challenge_type
+                'challenge_id': row.id,
+                'initial_balance': row.initial_balance,
+                'current_balance': row.current_balance,
+                'status': row.status,
+                'start_date': row.start_date,
+                'end_date': row.end_date,
+                'max_daily_loss': row.max_daily_loss,
+                'max_total_loss': row.max_total_loss,
+                'profit_target': row.profit_target,
+                'challenge_type': row.challenge_type
             })
         
         return jsonify({
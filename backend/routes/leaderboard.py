@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import Float, Numeric, case, cast, func, select
 from backend.models import db, User, UserChallenge, Trade
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
@@ -8,61 +9,47 @@ def get_leaderboard():
     try:
         # SQL aggregation to get top 10 traders by profit percentage
         
-        # Calculate profit percentage for each user challenge
-        leaderboard_data = db.session.query(
+        # Calculate profit percentage once per user challenge (NULL when the initial balance is 0)
+        profit_percentage = ((UserChallenge.current_balance - UserChallenge.initial_balance) / func.nullif(UserChallenge.initial_balance, 0) * 100).label('profit_percentage')
+        # Finished challenges (funded/failed) rank first, active ones fill the remaining spots
+        priority = case((UserChallenge.status.in_(['funded', 'failed']), 0), else_=1).label('priority')
+        
+        ranked = select(
             User.username,
-            UserChallenge.initial_balance,
-            UserChallenge.current_balance,
             UserChallenge.status,
+            (UserChallenge.current_balance - UserChallenge.initial_balance).label('total_profit'),
             func.count(Trade.id).label('trade_count'),
-            ((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).label('profit_percentage')
+            profit_percentage,
+            priority
         ).join(UserChallenge, User.id == UserChallenge.user_id) \
          .outerjoin(Trade, UserChallenge.id == Trade.challenge_id) \
-         .filter(UserChallenge.status.in_(['funded', 'failed'])) \
+         .filter(UserChallenge.status.in_(['funded', 'failed', 'active'])) \
          .group_by(User.id, UserChallenge.id) \
-         .order_by(((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).desc()) \
-         .limit(10).all()
+         .cte('ranked')
+        
+        # Round in SQL (via NUMERIC, which PostgreSQL's round() requires)
+        leaderboard_data = db.session.execute(
+            select(
+                ranked.c.username,
+                ranked.c.status,
+                ranked.c.trade_count,
+                cast(func.round(cast(ranked.c.profit_percentage, Numeric), 2), Float),
+                cast(func.round(cast(ranked.c.total_profit, Numeric), 2), Float)
+            ).order_by(ranked.c.priority, ranked.c.profit_percentage.desc().nullslast())
+             .limit(10)
+        ).all()
         
         leaderboard_list = []
-        for idx, (username, initial_balance, current_balance, status, trade_count, profit_percentage) in enumerate(leaderboard_data, 1):
-            total_profit = current_balance - initial_balance
+        for idx, (username, status, trade_count, profit_percentage, total_profit) in enumerate(leaderboard_data, 1):
             leaderboard_list.append({
                 'rank': idx,
                 'username': username,
-                'profit_percentage': round(profit_percentage, 2),
-                'total_profit': round(total_profit, 2),
+                'profit_percentage': profit_percentage,
+                'total_profit': total_profit,
                 'challenge_status': status,
                 'trades': trade_count or 0
             })
         
-        # If we have less than 10, add some active challenges
-        if len(leaderboard_list) < 10:
-            remaining_spots = 10 - len(leaderboard_list)
-            active_challenges = db.session.query(
-                User.username,
-                UserChallenge.initial_balance,
-                UserChallenge.current_balance,
-                UserChallenge.status,
-                func.count(Trade.id).label('trade_count'),
-                ((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).label('profit_percentage')
-            ).join(UserChallenge, User.id == UserChallenge.user_id) \
-             .outerjoin(Trade, UserChallenge.id == Trade.challenge_id) \
-             .filter(UserChallenge.status == 'active') \
-             .group_by(User.id, UserChallenge.id) \
-             .order_by(((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).desc()) \
-             .limit(remaining_spots).all()
-            
-            for idx, (username, initial_balance, current_balance, status, trade_count, profit_percentage) in enumerate(active_challenges, len(leaderboard_list)+1):
-                total_profit = current_balance - initial_balance
-                leaderboard_list.append({
-                    'rank': idx,
-                    'username': username,
-                    'profit_percentage': round(profit_percentage, 2),
-                    'total_profit': round(total_profit, 2),
-                    'challenge_status': status,
-                    'trades': trade_count or 0
-                })
-        
         return jsonify({
             'leaderboard': leaderboard_list,
             'total_ranked': len(leaderboard_list)
@@ -1,23 +1,91 @@
 from flask import Blueprint, request, jsonify
 import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
+import re
 import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
+import json
+import os
+from cachetools import TTLCache
 import atexit
 from services.news_service import news_service
+from services.redis_client import redis_client
+from ticker_meta import TICKER_META, GENERIC_META
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache for storing the latest prices
-price_cache = {}
+# Cache for storing the latest prices (entries expire after 30 seconds)
+PRICE_CACHE_TTL = 30
+price_cache = TTLCache(maxsize=1024, ttl=PRICE_CACHE_TTL)
 cache_lock = threading.Lock()
 
+# Shared scraping settings, built once at import time
+SCRAPER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Keep-alive session shared by the scrapers so retries and repeat calls reuse connections
+scraper_session = requests.Session()
+scraper_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+scraper_session.headers.update(SCRAPER_HEADERS)
+scraper_session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+# Scraped Moroccan stocks: pages to try in order, and the price used when all of them fail
+MOROCCAN_STOCKS = {
+    'IAM': {  # Maroc Telecom
+        'urls': (
+            'https://www.investing.com/equities/maroc-telecom',
+            'https://markets.businessinsider.com/stocks/iam-stock',
+        ),
+        'default_price': 78.50,
+    },
+    'ATW': {  # Attijariwafa Bank
+        'urls': (
+            'https://www.investing.com/equities/attijariwafa-bank',
+            'https://markets.businessinsider.com/stocks/atw-stock',
+        ),
+        'default_price': 1250.00,
+    },
+}
+
+# Look for common patterns in financial websites ({symbol} is filled in per stock)
+_PRICE_SELECTOR_TEMPLATES = (
+    '[data-test="instrument-price-last"]',
+    '.price',
+    '.last-price',
+    '.stock-price',
+    '.financial-data',
+    'span[data-symbol="{symbol}"]',
+    '.quote',
+    '.value',
+)
+_SELECTORS = {
+    symbol: tuple(selector.format(symbol=symbol) for selector in _PRICE_SELECTOR_TEMPLATES)
+    for symbol in MOROCCAN_STOCKS
+}
+
+# Strips everything except digits, '.' and '-' from scraped price text
+_PRICE_RE = re.compile(r'[^0-9.\-]+')
+
+
+def utc_timestamp():
+    """
+    Current UTC time as an ISO 8601 string with second precision
+    """
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
 
 def get_international_price(ticker):
     """
@@ -32,7 +100,7 @@ def get_international_price(ticker):
             return {
                 'symbol': ticker.upper(),
                 'price': round(latest_price, 2),
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': utc_timestamp(),
                 'source': 'international'
             }
         else:
@@ -41,7 +109,7 @@ def get_international_price(ticker):
             return {
                 'symbol': ticker.upper(),
                 'price': round(fast_info.get('lastPrice', fast_info.get('previousClose', 0)), 2),
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': utc_timestamp(),
                 'source': 'international'
             }
     except Exception as e:
@@ -49,7 +117,7 @@ def get_international_price(ticker):
         return {
             'symbol': ticker.upper(),
             'price': 0,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': utc_timestamp(),
             'source': 'international',
             'error': str(e)
         }
@@ -60,15 +128,13 @@ def get_moroccan_price(symbol):
     Get real-time price for Moroccan stocks (IAM, ATW) using web scraping
     """
     try:
-        if symbol.upper() == 'IAM':
-            return scrape_iam_price()
-        elif symbol.upper() == 'ATW':
-            return scrape_atw_price()
+        if symbol.upper() in MOROCCAN_STOCKS:
+            return scrape_moroccan_price(symbol.upper())
         else:
             return {
                 'symbol': symbol.upper(),
                 'price': 0,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': utc_timestamp(),
                 'source': 'moroccan',
                 'error': f'Symbol {symbol} not supported'
             }
@@ -77,58 +143,39 @@ def get_moroccan_price(symbol):
         return {
             'symbol': symbol.upper(),
             'price': 0,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': utc_timestamp(),
             'source': 'moroccan',
             'error': str(e)
         }
 
 
-def scrape_iam_price():
+def scrape_moroccan_price(symbol):
     """
-    Scrape IAM (Maroc Telecom) price from a financial website
+    Scrape a Moroccan stock's price (symbol is a MOROCCAN_STOCKS key) from financial websites
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    stock = MOROCCAN_STOCKS[symbol]
     
     # Attempt to get price from known financial websites
-    urls_to_try = [
-        'https://www.investing.com/equities/maroc-telecom',
-        'https://markets.businessinsider.com/stocks/iam-stock',
-    ]
-    
-    for url in urls_to_try:
+    for url in stock['urls']:
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = scraper_session.get(url, timeout=10)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for common patterns in financial websites
-                price_selectors = [
-                    '[data-test="instrument-price-last"]',
-                    '.price',
-                    '.last-price',
-                    '.stock-price',
-                    '.financial-data',
-                    'span[data-symbol="IAM"]',
-                    '.quote',
-                    '.value'
-                ]
+                tree = LexborHTMLParser(response.text)
                 
-                for selector in price_selectors:
-                    element = soup.select_one(selector)
+                for selector in _SELECTORS[symbol]:
+                    element = tree.css_first(selector)
                     if element:
                         try:
-                            price_text = element.get_text(strip=True)
+                            price_text = element.text(strip=True)
                             # Clean the price text
-                            price_text = ''.join(c for c in price_text if c.isdigit() or c in '.-')
+                            price_text = _PRICE_RE.sub('', price_text)
                             if price_text and price_text != '.':
                                 price = float(price_text)
                                 if price > 0:  # Valid price found
                                     return {
-                                        'symbol': 'IAM',
+                                        'symbol': symbol,
                                         'price': price,
-                                        'timestamp': datetime.now().isoformat(),
+                                        'timestamp': utc_timestamp(),
                                         'source': 'moroccan'
                                     }
                         except ValueError:
@@ -140,77 +187,23 @@ def scrape_iam_price():
     
     # If all attempts fail, return a reasonable default
     return {
-        'symbol': 'IAM',
-        'price': 78.50,  # Default mock price
-        'timestamp': datetime.now().isoformat(),
+        'symbol': symbol,
+        'price': stock['default_price'],  # Default mock price
+        'timestamp': utc_timestamp(),
         'source': 'moroccan',
         'note': 'Using default price - unable to fetch from financial sources'
     }
 
 
-def scrape_atw_price():
+# Moroccan symbols are scraped; any other symbol is fetched through yfinance
+PRICE_FETCHERS = dict.fromkeys(MOROCCAN_STOCKS, get_moroccan_price)
+
+
+def fetch_price(ticker_upper):
     """
-    Scrape ATW (Attijariwafa Bank) price from a financial website
+    Fetch a fresh price for an upper-cased symbol, bypassing the cache
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    # Attempt to get price from known financial websites
-    urls_to_try = [
-        'https://www.investing.com/equities/attijariwafa-bank',
-        'https://markets.businessinsider.com/stocks/atw-stock',
-    ]
-    
-    for url in urls_to_try:
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Look for common patterns in financial websites
-                price_selectors = [
-                    '[data-test="instrument-price-last"]',
-                    '.price',
-                    '.last-price',
-                    '.stock-price',
-                    '.financial-data',
-                    'span[data-symbol="ATW"]',
-                    '.quote',
-                    '.value'
-                ]
-                
-                for selector in price_selectors:
-                    element = soup.select_one(selector)
-                    if element:
-                        try:
-                            price_text = element.get_text(strip=True)
-                            # Clean the price text
-                            price_text = ''.join(c for c in price_text if c.isdigit() or c in '.-')
-                            if price_text and price_text != '.':
-                                price = float(price_text)
-                                if price > 0:  # Valid price found
-                                    return {
-                                        'symbol': 'ATW',
-                                        'price': price,
-                                        'timestamp': datetime.now().isoformat(),
-                                        'source': 'moroccan'
-                                    }
-                        except ValueError:
-                            continue  # If conversion fails, try next selector
-                
-        except Exception as e:
-            logger.debug(f"Failed to scrape from {url}: {str(e)}")
-            continue  # Try next URL
-    
-    # If all attempts fail, return a reasonable default
-    return {
-        'symbol': 'ATW',
-        'price': 1250.00,  # Default mock price
-        'timestamp': datetime.now().isoformat(),
-        'source': 'moroccan',
-        'note': 'Using default price - unable to fetch from financial sources'
-    }
+    return PRICE_FETCHERS.get(ticker_upper, get_international_price)(ticker_upper)
 
 
 def get_cached_price(symbol):
@@ -218,55 +211,115 @@ def get_cached_price(symbol):
     Get price from cache if available, otherwise fetch fresh data
     """
     with cache_lock:
-        if symbol in price_cache:
-            # Check if cache is still fresh (less than 30 seconds old)
-            cached_time = datetime.fromisoformat(price_cache[symbol]['timestamp'])
-            if (datetime.now() - cached_time).seconds < 30:
-                return price_cache[symbol]
+        cached = price_cache.get(symbol)
+    if cached:
+        return cached
     
-    # Fetch fresh data
-    ticker_upper = symbol.upper()
+    # Shared cache so every Gunicorn worker reuses the same fetch
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(f"price:{symbol}")
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            logger.debug(f"Redis price lookup failed for {symbol}: {str(e)}")
     
-    # Check if it's a Moroccan stock
-    if ticker_upper in ['IAM', 'ATW']:
-        data = get_moroccan_price(ticker_upper)
-    else:
-        # Assume it's an international stock
-        data = get_international_price(ticker_upper)
+    # Fetch fresh data
+    data = fetch_price(symbol.upper())
     
     # Update cache
-    with cache_lock:
-        price_cache[symbol] = data
+    store_price(symbol, data)
     
     return data
 
 
-# Initialize the scheduler for periodic updates
-scheduler = BackgroundScheduler()
-scheduler.start()
+def store_price(symbol, data):
+    """
+    Save a price in the local cache and, when configured, the shared Redis cache
+    """
+    with cache_lock:
+        price_cache[symbol] = data
+    if redis_client is not None:
+        try:
+            redis_client.setex(f"price:{symbol}", PRICE_CACHE_TTL, json.dumps(data))
+        except Exception as e:
+            logger.debug(f"Redis price store failed for {symbol}: {str(e)}")
+
+
+def get_international_prices(tickers):
+    """
+    Get the latest prices for several international tickers with one batched yfinance download
+    """
+    try:
+        df = yf.download(tickers, period='1d', interval='1m', progress=False, threads=True, group_by='ticker')
+    except Exception as e:
+        logger.error(f"Error downloading international prices for {tickers}: {str(e)}")
+        df = None
+    
+    timestamp = utc_timestamp()
+    prices = {}
+    for ticker in tickers:
+        try:
+            closes = df[ticker]['Close'].dropna()
+            if closes.empty:
+                raise ValueError('no data')
+            prices[ticker] = {
+                'symbol': ticker.upper(),
+                'price': round(float(closes.iloc[-1]), 2),
+                'timestamp': timestamp,
+                'source': 'international'
+            }
+        except Exception:
+            # Fall back to the single-ticker lookup (history, then fast_info)
+            prices[ticker] = get_international_price(ticker)
+    
+    return prices
+
 
 # Schedule periodic updates for common symbols
+INTERNATIONAL_SYMBOLS = ['AAPL', 'TSLA', 'BTC-USD']
+MOROCCAN_SYMBOLS = ['IAM', 'ATW']
+
 def update_common_prices():
-    common_symbols = ['AAPL', 'TSLA', 'BTC-USD', 'IAM', 'ATW']
-    for symbol in common_symbols:
+    # One batched download for the international symbols, scrapers run side by side
+    prices = get_international_prices(INTERNATIONAL_SYMBOLS)
+    with ThreadPoolExecutor(max_workers=len(MOROCCAN_SYMBOLS)) as executor:
+        prices.update(zip(MOROCCAN_SYMBOLS, executor.map(get_moroccan_price, MOROCCAN_SYMBOLS)))
+    
+    for symbol, price_data in prices.items():
         try:
-            price_data = get_cached_price(symbol)
+            store_price(symbol, price_data)
             logger.info(f"Updated cache for {symbol}: {price_data['price']}")
         except Exception as e:
             logger.error(f"Error updating cache for {symbol}: {str(e)}")
 
-# Add job to update prices every 30 seconds
-scheduler.add_job(
-    func=update_common_prices,
-    trigger="interval",
-    seconds=30,
-    id='price_updates',
-    name='Update common stock prices',
-    replace_existing=True
-)
 
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
+def schedule_price_updates(scheduler):
+    """
+    Add the 30 second price refresh job to an APScheduler scheduler
+    """
+    scheduler.add_job(
+        func=update_common_prices,
+        trigger="interval",
+        seconds=30,
+        id='price_updates',
+        name='Update common stock prices',
+        replace_existing=True
+    )
+    return scheduler
+
+
+# Only the process started with RUN_SCHEDULER=1 refreshes prices, so every
+# Gunicorn worker doesn't poll the data sources on its own (see scheduler.py)
+scheduler = None
+if os.environ.get('RUN_SCHEDULER') == '1':
+    from apscheduler.schedulers.background import BackgroundScheduler
+    
+    scheduler = schedule_price_updates(BackgroundScheduler())
+    scheduler.start()
+    
+    # Shut down the scheduler when exiting the app
+    atexit.register(lambda: scheduler.shutdown())
 
 
 real_time_data_bp = Blueprint('real_time_data', __name__)
@@ -326,16 +379,18 @@ def get_multiple_prices():
         if not data or 'tickers' not in data:
             return jsonify({'error': 'Tickers list is required'}), 400
         
-        tickers = data['tickers']
+        tickers = list(data['tickers'] or [])
         results = {}
         
-        for ticker in tickers:
-            price_data = get_cached_price(ticker)
-            results[ticker] = price_data
+        if tickers:
+            # Fetch all tickers concurrently so cache misses overlap instead of adding up
+            # (under gevent workers the pool threads are greenlets)
+            with ThreadPoolExecutor(max_workers=min(32, len(tickers))) as executor:
+                results = dict(zip(tickers, executor.map(get_cached_price, tickers)))
         
         return jsonify({
             'prices': results,
-            'timestamp': get_cached_price(list(tickers)[0])['timestamp'] if tickers else None
+            'timestamp': results[tickers[0]]['timestamp'] if tickers else None
         }), 200
         
     except Exception as e:
@@ -348,11 +403,10 @@ def get_price_info(ticker):
     Get detailed information about a specific ticker
     """
     try:
+        ticker_upper = ticker.upper()
+        
         # Get the price data
-        if ticker.upper() in ['IAM', 'ATW']:
-            price_data = get_moroccan_price(ticker)
-        else:
-            price_data = get_international_price(ticker)
+        price_data = fetch_price(ticker_upper)
         
         if 'error' in price_data:
             return jsonify({
@@ -369,48 +423,7 @@ def get_price_info(ticker):
         }
         
         # Add specific details based on the stock
-        if ticker.upper() == 'AAPL':
-            info_data.update({
-                'company_name': 'Apple Inc.',
-                'exchange': 'NASDAQ',
-                'currency': 'USD',
-                'sector': 'Technology'
-            })
-        elif ticker.upper() == 'TSLA':
-            info_data.update({
-                'company_name': 'Tesla, Inc.',
-                'exchange': 'NASDAQ',
-                'currency': 'USD',
-                'sector': 'Automotive'
-            })
-        elif ticker.upper() == 'BTC-USD':
-            info_data.update({
-                'asset_name': 'Bitcoin',
-                'type': 'Cryptocurrency',
-                'currency': 'USD',
-                'market_cap_category': 'Crypto'
-            })
-        elif ticker.upper() == 'IAM':
-            info_data.update({
-                'company_name': 'Maroc Telecom',
-                'exchange': 'Casablanca Stock Exchange',
-                'currency': 'MAD',
-                'sector': 'Telecommunications'
-            })
-        elif ticker.upper() == 'ATW':
-            info_data.update({
-                'company_name': 'Attijariwafa Bank',
-                'exchange': 'Casablanca Stock Exchange',
-                'currency': 'MAD',
-                'sector': 'Banking'
-            })
-        else:
-            # Generic information
-            info_data.update({
-                'exchange': 'Unknown',
-                'currency': 'USD',
-                'sector': 'General'
-            })
+        info_data.update(TICKER_META.get(ticker_upper, GENERIC_META))
         
         return jsonify(info_data), 200
         
@@ -1,8 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import delete, func, insert, select
 from backend.models import db, UserChallenge, Trade
 
 trades_bp = Blueprint('trades', __name__)
 
+# Maximum number of trades accepted by one /trade/bulk request
+BULK_TRADE_LIMIT = 5000
+
+
+def not_modified(etag):
+    """Empty 304 response that repeats the client's (still valid) ETag"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
 @trades_bp.route('/trade/create', methods=['POST'])
 def create_trade():
     try:
@@ -57,6 +68,67 @@ def create_trade():
         return jsonify({'error': str(e)}), 500
 
 
+@trades_bp.route('/trade/bulk', methods=['POST'])
+def create_trades_bulk():
+    """
+    Create many trades in one INSERT (executemany) and a single commit
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, list) or not data:
+            return jsonify({'error': 'A non-empty list of trades is required'}), 400
+        
+        if len(data) > BULK_TRADE_LIMIT:
+            return jsonify({'error': f'At most {BULK_TRADE_LIMIT} trades per request'}), 400
+        
+        # Validate every row before touching the database
+        rows = []
+        for idx, item in enumerate(data):
+            if not isinstance(item, dict) or not all(k in item for k in ('challenge_id', 'asset_name', 'entry_price', 'type')):
+                return jsonify({'error': f'Trade {idx}: challenge ID, asset name, entry price, and type are required'}), 400
+            
+            trade_type = str(item['type']).lower()
+            if trade_type not in ['buy', 'sell']:
+                return jsonify({'error': f'Trade {idx}: trade type must be either "buy" or "sell"'}), 400
+            
+            try:
+                entry_price = float(item['entry_price'])
+            except (TypeError, ValueError):
+                return jsonify({'error': f'Trade {idx}: entry price must be a valid number'}), 400
+            
+            rows.append({
+                'challenge_id': item['challenge_id'],
+                'asset_name': item['asset_name'],
+                'entry_price': entry_price,
+                'type': trade_type
+            })
+        
+        # All referenced challenges must exist and be active (one query for the whole batch)
+        challenge_ids = {row['challenge_id'] for row in rows}
+        active_ids = set(db.session.execute(
+            select(UserChallenge.id).where(UserChallenge.id.in_(challenge_ids), UserChallenge.status == 'active')
+        ).scalars())
+        inactive_ids = challenge_ids - active_ids
+        if inactive_ids:
+            return jsonify({
+                'error': 'Challenges not found or inactive',
+                'challenge_ids': sorted(inactive_ids, key=str)
+            }), 400
+        
+        db.session.execute(insert(Trade), rows)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Trades created successfully',
+            'trades_created': len(rows)
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @trades_bp.route('/trade/<int:trade_id>', methods=['GET'])
 def get_trade(trade_id):
     try:
@@ -65,14 +137,21 @@ def get_trade(trade_id):
         if not trade:
             return jsonify({'error': 'Trade not found'}), 404
         
-        return jsonify({
+        # Trades are never edited, so id + timestamp identifies this representation
+        etag = f'{trade.id}-{int(trade.timestamp.timestamp() * 1000000)}'
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        
+        response = jsonify({
             'trade_id': trade.id,
             'challenge_id': trade.challenge_id,
             'asset_name': trade.asset_name,
             'entry_price': trade.entry_price,
             'type': trade.type,
             'timestamp': trade.timestamp.isoformat()
-        }), 200
+        })
+        response.set_etag(etag, weak=True)
+        return response, 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -81,29 +160,41 @@ def get_trade(trade_id):
 @trades_bp.route('/challenge/<int:challenge_id>/trades', methods=['GET'])
 def get_challenge_trades(challenge_id):
     try:
-        # Check if challenge exists
-        challenge = UserChallenge.query.get(challenge_id)
-        if not challenge:
-            return jsonify({'error': 'Challenge not found'}), 404
+        # One aggregate row tells us whether the trade list changed since the client's copy
+        last_ts, trades_count = db.session.query(
+            func.max(Trade.timestamp), func.count(Trade.id)
+        ).filter_by(challenge_id=challenge_id).one()
         
-        # Get all trades for this challenge
-        trades = Trade.query.filter_by(challenge_id=challenge_id).order_by(Trade.timestamp.desc()).all()
-        
-        trades_list = []
-        for trade in trades:
-            trades_list.append({
-                'trade_id': trade.id,
-                'asset_name': trade.asset_name,
-                'entry_price': trade.entry_price,
-                'type': trade.type,
-                'timestamp': trade.timestamp.isoformat()
-            })
+        # Only an empty result needs the existence check (404 vs. no trades yet)
+        if not trades_count and db.session.query(UserChallenge.id).filter_by(id=challenge_id).scalar() is None:
+            return jsonify({'error': 'Challenge not found'}), 404
         
-        return jsonify({
+        last_ts_us = int(last_ts.timestamp() * 1000000) if last_ts else 0
+        etag = f'{challenge_id}-{trades_count}-{last_ts_us}'
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        
+        # Get all trades for this challenge as plain rows, labelled with the response keys
+        trades = db.session.execute(
+            select(
+                Trade.id.label('trade_id'),
+                Trade.asset_name,
+                Trade.entry_price,
+                Trade.type,
+                Trade.timestamp
+            ).where(Trade.challenge_id == challenge_id).order_by(Trade.timestamp.desc())
+        ).all()
+        
+        # The orjson provider renders the datetimes directly
+        trades_list = [dict(trade._mapping) for trade in trades]
+        
+        response = jsonify({
             'challenge_id': challenge_id,
             'trades_count': len(trades_list),
             'trades': trades_list
-        }), 200
+        })
+        response.set_etag(etag, weak=True)
+        return response, 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -112,14 +203,15 @@ def get_challenge_trades(challenge_id):
 @trades_bp.route('/trade/<int:trade_id>', methods=['DELETE'])
 def delete_trade(trade_id):
     try:
-        trade = Trade.query.get(trade_id)
+        # Delete in one statement; RETURNING tells us whether the trade existed
+        deleted = db.session.execute(
+            delete(Trade).where(Trade.id == trade_id).returning(Trade.challenge_id)
+        ).first()
         
-        if not trade:
+        if deleted is None:
+            db.session.rollback()
             return jsonify({'error': 'Trade not found'}), 404
         
-        challenge_id = trade.challenge_id
-        
-        db.session.delete(trade)
         db.session.commit()
         
         return jsonify({
@@ -1,10 +1,28 @@
 from flask import Blueprint, request, jsonify
-from backend.models import db, User, UserChallenge
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from backend.models import db, User, UserChallenge, PASSWORD_HASH_METHOD, run_cpu_bound
 import re
-from werkzeug.security import check_password_hash
+from functools import lru_cache
+from werkzeug.security import check_password_hash, generate_password_hash
 
 users_bp = Blueprint('users', __name__)
 
+# Basic email format check, compiled once
+_EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    """Hash checked for unknown usernames so they take as long as a wrong password"""
+    return generate_password_hash('dummy-password', PASSWORD_HASH_METHOD)
+
+
+# Admin panel pagination
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 500
+
 
 @users_bp.route('/register', methods=['POST'])
 def register():
@@ -20,22 +38,27 @@ def register():
         password = data['password']
         
         # Validate email format
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if not _EMAIL_RE.match(email):
             return jsonify({'error': 'Invalid email format'}), 400
         
-        # Check if user already exists
-        if User.query.filter_by(username=username).first():
-            return jsonify({'error': 'Username already exists'}), 409
-        
-        if User.query.filter_by(email=email).first():
-            return jsonify({'error': 'Email already exists'}), 409
-        
-        # Create new user
+        # Create new user; the unique constraints on username/email reject duplicates
         user = User(username=username, email=email)
         user.set_password(password)
         
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            # One query to report which field collided
+            existing = db.session.query(User.username, User.email).filter(
+                or_(User.username == username, User.email == email)
+            ).limit(2).all()
+            if any(row.username == username for row in existing):
+                return jsonify({'error': 'Username already exists'}), 409
+            if existing:
+                return jsonify({'error': 'Email already exists'}), 409
+            return jsonify({'error': 'User already exists'}), 409
         
         return jsonify({
             'message': 'User registered successfully',
@@ -59,9 +82,15 @@ def login():
         username = data['username']
         password = data['password']
         
+        # Always look the user up (an indexed query), so unknown and known usernames cost the same
         user = User.query.filter_by(username=username).first()
         
-        if not user or not user.check_password(password):
+        if not user:
+            # Equalize timing with the wrong-password path
+            run_cpu_bound(check_password_hash, _dummy_password_hash(), password)
+            return jsonify({'error': 'Invalid credentials'}), 401
+        
+        if not user.check_password(password):
             return jsonify({'error': 'Invalid credentials'}), 401
         
         return jsonify({
@@ -94,33 +123,44 @@ def get_user(user_id):
 
 @users_bp.route('/admin', methods=['GET'])
 def get_admin_panel():
+    """
+    List users with their challenges, paginated by user id (?limit=&after_id=)
+    """
     try:
-        # Get all users with their challenge information
-        users_data = db.session.query(
-            User.id,
-            User.username,
-            User.email,
-            UserChallenge.id.label('challenge_id'),
-            UserChallenge.status.label('challenge_status'),
-            UserChallenge.current_balance,
-            UserChallenge.initial_balance,
-        ).outerjoin(UserChallenge, User.id == UserChallenge.user_id).all()
-        
+        try:
+            limit = min(max(int(request.args.get('limit', ADMIN_PAGE_SIZE)), 1), ADMIN_MAX_PAGE_SIZE)
+            after_id = int(request.args.get('after_id', 0))
+        except ValueError:
+            return jsonify({'error': 'limit and after_id must be integers'}), 400
+        
+        # Get one page of users, then their challenges in one batched IN query (no repeated user columns)
+        users = User.query.options(selectinload(User.challenges)) \
+            .filter(User.id > after_id) \
+            .order_by(User.id) \
+            .limit(limit).all()
+        
+        # One row per challenge, or a single row for users without a challenge
         users_list = []
-        for user_data in users_data:
-            users_list.append({
-                'user_id': user_data.id,
-                'username': user_data.username,
-                'email': user_data.email,
-                'challenge_id': user_data.challenge_id,
-                'challenge_status': user_data.challenge_status,
-                'current_balance': user_data.current_balance,
-                'initial_balance': user_data.initial_balance,
-            })
-        
+        for user in users:
+            for challenge in user.challenges or [None]:
+                users_list.append({
+                    'user_id': user.id,
+                    'username': user.username,
+                    'email': user.email,
+                    'challenge_id': challenge.id if challenge else None,
+                    'challenge_status': challenge.status if challenge else None,
+                    'current_balance': challenge.current_balance if challenge else None,
+                    'initial_balance': challenge.initial_balance if challenge else None,
+                })
+        
+        # Cursor for the next page (None on the last page)
+        next_after_id = users[-1].id if len(users) == limit else None
+        
+        # The page is bounded by limit, so it is serialized in one go (orjson via app.json)
         return jsonify({
             'users': users_list,
-            'total_users': len(users_list)
+            'total_users': len(users_list),
+            'next_after_id': next_after_id
         }), 200
         
     except Exception as e:
@@ -141,14 +181,19 @@ def update_user_status(user_id):
         if new_status not in ['active', 'failed', 'funded']:
             return jsonify({'error': 'Invalid status. Must be active, failed, or funded'}), 400
         
-        # Find user's challenge
-        challenge = UserChallenge.query.filter_by(user_id=user_id).first()
-        
-        if not challenge:
+        # Update the user's (first) challenge in one statement; no row means no challenge
+        first_challenge_id = select(func.min(UserChallenge.id)).where(UserChallenge.user_id == user_id).scalar_subquery()
+        result = db.session.execute(
+            update(UserChallenge)
+            .where(UserChallenge.id == first_challenge_id)
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount == 0:
+            db.session.rollback()
             return jsonify({'error': 'User does not have a challenge'}), 404
         
-        # Update the challenge status
-        challenge.status = new_status
         db.session.commit()
         
         return jsonify({
@@ -0,0 +1,16 @@
+"""
+Standalone price refresher for the backend API
+Run one instance next to the web workers: REDIS_URL=... python scheduler.py
+Prices are written to the shared Redis cache the workers read from.
+"""
+from apscheduler.schedulers.blocking import BlockingScheduler
+from routes.real_time_data import schedule_price_updates, update_common_prices, redis_client, logger
+
+
+if __name__ == '__main__':
+    if redis_client is None:
+        logger.warning("REDIS_URL is not set; refreshed prices will not reach the web workers")
+    
+    # Warm the cache right away instead of waiting for the first interval
+    update_common_prices()
+    schedule_price_updates(BlockingScheduler()).start()
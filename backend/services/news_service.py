@@ -1,17 +1,281 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 from flask import jsonify
 import yfinance as yf
 import json
+from cachetools import TTLCache
+
+try:
+    # Used to parse RSS feeds; without it the RSS fallback is skipped
+    import feedparser
+except ImportError:
+    print("feedparser not installed, using mock data")
+    feedparser = None
+
+try:
+    from services.redis_client import redis_client
+except ImportError:
+    # Imported from backend/services directly (see routes/real_time_data.py in the root app)
+    from redis_client import redis_client
+
+# News changes slowly; serve cached results for a minute
+NEWS_CACHE_TTL = 60
+NEWS_CACHE_KEY = 'news:financial'
+
+# S&P 500, Dow Jones and Nasdaq bars used for the market-context news, cached for 5 minutes
+MARKET_INDICES = ('^GSPC', '^DJI', '^IXIC')
+MARKET_DATA_TTL = 300
+
+# List of financial RSS feeds
+RSS_FEEDS = (
+    'https://feeds.reuters.com/reuters/businessNews',  # Reuters business
+    'https://feeds.reuters.com/reuters/marketsNews',   # Reuters markets
+    'https://www.ft.com/rss/markets',                  # Financial Times markets
+    'https://feeds.bbci.co.uk/news/business/rss.xml',  # BBC Business
+)
+
+# Per-feed download timeout in seconds
+RSS_TIMEOUT = 3
+
+
+def stable_id(text):
+    """
+    Short numeric id for an article title that stays the same across processes
+    (the built-in hash() of a str is randomized per process)
+    """
+    return zlib.crc32(text.encode('utf-8')) % 1000000
+
+
+def _keyword_pattern(keywords):
+    """Compile keywords into one regex that matches any of them as a substring"""
+    # Longest first so overlapping keywords report the most specific match
+    return re.compile('|'.join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+
+# Keyword sets for article classification (substring matches on the lower-cased title)
+ARTICLE_TYPE_KEYWORDS = (
+    ('economic', frozenset({'fed', 'federal reserve', 'interest rate', 'monetary policy'})),
+    ('crypto', frozenset({'bitcoin', 'ethereum', 'cryptocurrency', 'crypto'})),
+    ('commodity', frozenset({'oil', 'gold', 'commodity', 'energy'})),
+    ('technology', frozenset({'ai ', 'artificial intelligence', 'tech giant', 'nasdaq'})),
+)
+
+HIGH_PRIORITY_KEYWORDS = frozenset({
+    'crash', 'crisis', 'volatile', 'emergency', 'shutdown',
+    'ban', 'protest', 'war', 'conflict', 'sanction', 'scandal'
+})
+
+MEDIUM_PRIORITY_KEYWORDS = frozenset({
+    'earnings', 'report', 'growth', 'decline', 'rise', 'fall',
+    'merge', 'acquire', 'partnership', 'investment'
+})
+
+# Reverse index from keyword to article type (first category listed wins)
+KEYWORD_ARTICLE_TYPES = {}
+for _article_type, _keywords in ARTICLE_TYPE_KEYWORDS:
+    for _keyword in _keywords:
+        KEYWORD_ARTICLE_TYPES.setdefault(_keyword, _article_type)
+
+# Rank of each article type; the lowest-ranked type found in a title wins
+ARTICLE_TYPE_RANKS = {article_type: rank for rank, (article_type, _) in enumerate(ARTICLE_TYPE_KEYWORDS)}
+
+# One pass over the title finds every type keyword; the lookahead makes the
+# matches overlap, so a keyword inside another one is still seen
+ARTICLE_TYPE_PATTERN = re.compile('(?=(' + _keyword_pattern(KEYWORD_ARTICLE_TYPES).pattern + '))')
+HIGH_PRIORITY_PATTERN = _keyword_pattern(HIGH_PRIORITY_KEYWORDS)
+MEDIUM_PRIORITY_PATTERN = _keyword_pattern(MEDIUM_PRIORITY_KEYWORDS)
+
+# Static fallback articles, built once at import. Callers only serialize them,
+# so the same dicts are shared across responses
+MOCK_MARKET_NEWS = (
+    {
+        'id': 2,
+        'title': 'Federal Reserve maintains cautious stance on interest rates',
+        'description': 'Central bank officials signal potential pause in rate hikes amid inflation concerns and employment data.',
+        'source': 'Reuters',
+        'time': 'Il y a 45 minutes',
+        'type': 'economic',
+        'priority': 'high'
+    },
+    {
+        'id': 3,
+        'title': 'Technology stocks show resilience despite market volatility',
+        'description': 'Major tech companies demonstrate strong fundamentals as investors seek stable growth prospects.',
+        'source': 'Bloomberg',
+        'time': 'Il y a 2 heures',
+        'type': 'technology',
+        'priority': 'medium'
+    },
+    {
+        'id': 4,
+        'title': 'Energy sector reacts to latest oil inventory report',
+        'description': 'Crude oil futures adjust following weekly inventory data and geopolitical developments.',
+        'source': 'CNBC',
+        'time': 'Il y a 3 heures',
+        'type': 'commodity',
+        'priority': 'low'
+    },
+    {
+        'id': 5,
+        'title': 'AI-driven trading algorithms show promising results in Q4',
+        'description': 'Automated trading systems leverage machine learning to adapt to rapidly changing market conditions.',
+        'source': 'AI Analysis',
+        'time': 'Il y a 4 heures',
+        'type': 'analysis',
+        'priority': 'medium'
+    }
+)
+
+MOCK_BASIC_NEWS = (
+    {
+        'id': 1,
+        'title': 'Market shows resilience amid economic uncertainty',
+        'description': 'Global markets demonstrate stability despite ongoing economic challenges and geopolitical tensions.',
+        'source': 'Financial Times',
+        'time': 'Il y a 15 minutes',
+        'type': 'general',
+        'priority': 'medium'
+    },
+    {
+        'id': 2,
+        'title': 'Federal Reserve policy outlook influences trading patterns',
+        'description': 'Investors closely monitor central bank communications for clues about future monetary policy.',
+        'source': 'Wall Street Journal',
+        'time': 'Il y a 45 minutes',
+        'type': 'economic',
+        'priority': 'high'
+    },
+    {
+        'id': 3,
+        'title': 'Technology sector continues to drive innovation',
+        'description': 'Tech companies lead the way in developing new solutions for evolving market needs.',
+        'source': 'TechCrunch',
+        'time': 'Il y a 2 heures',
+        'type': 'technology',
+        'priority': 'medium'
+    },
+    {
+        'id': 4,
+        'title': 'Commodities market responds to supply chain updates',
+        'description': 'Raw material prices fluctuate based on global supply and demand dynamics.',
+        'source': 'MarketWatch',
+        'time': 'Il y a 3 heures',
+        'type': 'commodity',
+        'priority': 'low'
+    },
+    {
+        'id': 5,
+        'title': 'AI analysis predicts continued market adaptation',
+        'description': 'Artificial intelligence models suggest potential opportunities in current market conditions.',
+        'source': 'AI Analysis',
+        'time': 'Il y a 4 heures',
+        'type': 'analysis',
+        'priority': 'medium'
+    }
+)
+
+MOCK_ALT_NEWS = (
+    {
+        'id': 101,
+        'title': 'Global markets show mixed signals as inflation concerns persist',
+        'description': 'Equity markets fluctuated in early trading as investors weigh central bank policies against economic data.',
+        'source': 'Financial News',
+        'time': 'Il y a 10 minutes',
+        'type': 'general',
+        'priority': 'medium'
+    },
+    {
+        'id': 102,
+        'title': 'Cryptocurrency markets stabilize after recent volatility',
+        'description': 'Major cryptocurrencies show signs of stabilization following regulatory clarity announcements.',
+        'source': 'Crypto Daily',
+        'time': 'Il y a 25 minutes',
+        'type': 'crypto',
+        'priority': 'medium'
+    },
+    {
+        'id': 103,
+        'title': 'Energy sector gains as oil prices rise amid geopolitical tensions',
+        'description': 'Energy stocks rally on increased crude oil prices driven by supply concerns.',
+        'source': 'Energy Report',
+        'time': 'Il y a 40 minutes',
+        'type': 'commodity',
+        'priority': 'high'
+    },
+    {
+        'id': 104,
+        'title': 'Tech giants post strong earnings, driving sector optimism',
+        'description': 'Leading technology companies exceed quarterly expectations, boosting investor sentiment.',
+        'source': 'Tech Finance',
+        'time': 'Il y a 1 heure',
+        'type': 'technology',
+        'priority': 'high'
+    },
+    {
+        'id': 105,
+        'title': 'AI-driven trading platforms gain traction among retail investors',
+        'description': 'Algorithmic trading solutions powered by artificial intelligence see increased adoption.',
+        'source': 'AI Finance',
+        'time': 'Il y a 2 heures',
+        'type': 'analysis',
+        'priority': 'medium'
+    }
+)
+
 
 class NewsService:
     def __init__(self):
         # Using environment variable for API key or defaulting to None
         self.news_api_key = os.getenv('NEWS_API_KEY')
         self.base_url = 'https://newsapi.org/v2'
+        
+        # Keep-alive session shared by all outbound news requests
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        
+        self._cache = TTLCache(maxsize=4, ttl=NEWS_CACHE_TTL)
+        self._market_cache = TTLCache(maxsize=4, ttl=MARKET_DATA_TTL)
+        self._cache_lock = threading.Lock()
 
     def get_financial_news(self):
+        """
+        Fetch financial news, served from the local or shared Redis cache when fresh
+        """
+        with self._cache_lock:
+            cached = self._cache.get(NEWS_CACHE_KEY)
+        if cached is not None:
+            return cached
+        
+        if redis_client is not None:
+            try:
+                cached = redis_client.get(NEWS_CACHE_KEY)
+                if cached:
+                    return json.loads(cached)
+            except Exception as e:
+                print(f"Error reading cached news: {str(e)}")
+        
+        news = self._fetch_financial_news()
+        
+        with self._cache_lock:
+            self._cache[NEWS_CACHE_KEY] = news
+        if redis_client is not None:
+            try:
+                redis_client.setex(NEWS_CACHE_KEY, NEWS_CACHE_TTL, json.dumps(news))
+            except Exception as e:
+                print(f"Error caching news: {str(e)}")
+        
+        return news
+
+    def _fetch_financial_news(self):
         """
         Fetch financial news from NewsAPI or use alternative sources
         """
@@ -27,7 +291,7 @@ class NewsService:
                     'pageSize': 10
                 }
                 
-                response = requests.get(url, params=params)
+                response = self._session.get(url, params=params, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     articles = data.get('articles', [])
@@ -41,7 +305,7 @@ class NewsService:
                             source_name = article['source'].get('name', 'Unknown Source')
                         
                         formatted_article = {
-                            'id': hash(article['title']) % 1000000,  # Generate a simple ID
+                            'id': stable_id(article['title']),  # Generate a simple ID
                             'title': article['title'],
                             'description': article.get('description') or 'No description available',
                             'source': source_name,
@@ -73,16 +337,17 @@ class NewsService:
         """
         try:
             pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-            now = datetime.now(pub_date.tzinfo)
-            diff = now - pub_date
+            # Whole seconds since publication, so the branches below are plain int compares
+            seconds = int((datetime.now(pub_date.tzinfo) - pub_date).total_seconds())
             
-            if diff.days > 0:
-                return f"Il y a {diff.days} jour{'s' if diff.days > 1 else ''}"
-            elif diff.seconds > 3600:
-                hours = diff.seconds // 3600
+            if seconds >= 86400:
+                days = seconds // 86400
+                return f"Il y a {days} jour{'s' if days > 1 else ''}"
+            elif seconds > 3600:
+                hours = seconds // 3600
                 return f"Il y a {hours} heure{'s' if hours > 1 else ''}"
-            elif diff.seconds > 60:
-                minutes = diff.seconds // 60
+            elif seconds > 60:
+                minutes = seconds // 60
                 return f"Il y a {minutes} minute{'s' if minutes > 1 else ''}"
             else:
                 return "À l'instant"
@@ -95,16 +360,11 @@ class NewsService:
         """
         title_lower = title.lower()
         
-        if any(keyword in title_lower for keyword in ['fed', 'federal reserve', 'interest rate', 'monetary policy']):
-            return 'economic'
-        elif any(keyword in title_lower for keyword in ['bitcoin', 'ethereum', 'cryptocurrency', 'crypto']):
-            return 'crypto'
-        elif any(keyword in title_lower for keyword in ['oil', 'gold', 'commodity', 'energy']):
-            return 'commodity'
-        elif any(keyword in title_lower for keyword in ['ai ', 'artificial intelligence', 'tech giant', 'nasdaq']):
-            return 'technology'
-        else:
-            return 'general'
+        # Earliest category in ARTICLE_TYPE_KEYWORDS order wins
+        article_types = {KEYWORD_ARTICLE_TYPES[keyword] for keyword in ARTICLE_TYPE_PATTERN.findall(title_lower)}
+        if article_types:
+            return min(article_types, key=ARTICLE_TYPE_RANKS.__getitem__)
+        return 'general'
 
     def _determine_priority(self, title):
         """
@@ -112,40 +372,45 @@ class NewsService:
         """
         title_lower = title.lower()
         
-        high_priority_keywords = [
-            'crash', 'crisis', 'volatile', 'emergency', 'shutdown', 
-            'ban', 'protest', 'war', 'conflict', 'sanction', 'scandal'
-        ]
-        
-        medium_priority_keywords = [
-            'earnings', 'report', 'growth', 'decline', 'rise', 'fall',
-            'merge', 'acquire', 'partnership', 'investment'
-        ]
-        
-        if any(keyword in title_lower for keyword in high_priority_keywords):
+        if HIGH_PRIORITY_PATTERN.search(title_lower):
             return 'high'
-        elif any(keyword in title_lower for keyword in medium_priority_keywords):
+        elif MEDIUM_PRIORITY_PATTERN.search(title_lower):
             return 'medium'
         else:
             return 'low'
 
+    def _get_sp500_change(self):
+        """
+        Daily S&P 500 change in percent, from one batched index download cached for 5 minutes
+        """
+        cache_key = datetime.now().date().isoformat()
+        with self._cache_lock:
+            cached = self._market_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Get data for major indices in a single request (yfinance fetches them in parallel)
+        indices = yf.download(list(MARKET_INDICES), period='5d', group_by='ticker', threads=True, progress=False)
+        
+        sp500_change = 0
+        sp500 = indices['^GSPC']['Close'].dropna()
+        if len(sp500) > 1:
+            sp500_change = ((sp500.iloc[-1] - sp500.iloc[-2]) / sp500.iloc[-2]) * 100
+        
+        with self._cache_lock:
+            self._market_cache[cache_key] = sp500_change
+        return sp500_change
+
     def _generate_mock_news_with_market_data(self):
         """
         Generate mock news with some real market data
         """
         # Get some real market data to make it more realistic
         try:
-            # Get data for major indices
-            sp500 = yf.Ticker("^GSPC").history(period="1d")
-            djia = yf.Ticker("^DJI").history(period="1d")
-            nasdaq = yf.Ticker("^IXIC").history(period="1d")
+            sp500_change = self._get_sp500_change()
             
-            sp500_change = 0
-            if len(sp500) > 0 and len(sp500) > 1:
-                sp500_change = ((sp500['Close'].iloc[-1] - sp500['Close'].iloc[-2]) / sp500['Close'].iloc[-2]) * 100
-            
-            # Create mock articles with real market context
-            mock_articles = [
+            # Create mock articles with real market context (only the first one depends on it)
+            return [
                 {
                     'id': 1,
                     'title': f'S&P 500 records {"gain" if sp500_change >= 0 else "loss"} as market sentiment shifts',
@@ -155,220 +420,77 @@ class NewsService:
                     'type': 'general',
                     'priority': 'medium'
                 },
-                {
-                    'id': 2,
-                    'title': 'Federal Reserve maintains cautious stance on interest rates',
-                    'description': 'Central bank officials signal potential pause in rate hikes amid inflation concerns and employment data.',
-                    'source': 'Reuters',
-                    'time': 'Il y a 45 minutes',
-                    'type': 'economic',
-                    'priority': 'high'
-                },
-                {
-                    'id': 3,
-                    'title': 'Technology stocks show resilience despite market volatility',
-                    'description': 'Major tech companies demonstrate strong fundamentals as investors seek stable growth prospects.',
-                    'source': 'Bloomberg',
-                    'time': 'Il y a 2 heures',
-                    'type': 'technology',
-                    'priority': 'medium'
-                },
-                {
-                    'id': 4,
-                    'title': 'Energy sector reacts to latest oil inventory report',
-                    'description': 'Crude oil futures adjust following weekly inventory data and geopolitical developments.',
-                    'source': 'CNBC',
-                    'time': 'Il y a 3 heures',
-                    'type': 'commodity',
-                    'priority': 'low'
-                },
-                {
-                    'id': 5,
-                    'title': 'AI-driven trading algorithms show promising results in Q4',
-                    'description': 'Automated trading systems leverage machine learning to adapt to rapidly changing market conditions.',
-                    'source': 'AI Analysis',
-                    'time': 'Il y a 4 heures',
-                    'type': 'analysis',
-                    'priority': 'medium'
-                }
+                *MOCK_MARKET_NEWS
             ]
-            return mock_articles
         except Exception as e:
             # If we can't get real data, return basic mock data
             print(f"Error getting market data: {str(e)}")
-            return [
-                {
-                    'id': 1,
-                    'title': 'Market shows resilience amid economic uncertainty',
-                    'description': 'Global markets demonstrate stability despite ongoing economic challenges and geopolitical tensions.',
-                    'source': 'Financial Times',
-                    'time': 'Il y a 15 minutes',
-                    'type': 'general',
-                    'priority': 'medium'
-                },
-                {
-                    'id': 2,
-                    'title': 'Federal Reserve policy outlook influences trading patterns',
-                    'description': 'Investors closely monitor central bank communications for clues about future monetary policy.',
-                    'source': 'Wall Street Journal',
-                    'time': 'Il y a 45 minutes',
-                    'type': 'economic',
-                    'priority': 'high'
-                },
-                {
-                    'id': 3,
-                    'title': 'Technology sector continues to drive innovation',
-                    'description': 'Tech companies lead the way in developing new solutions for evolving market needs.',
-                    'source': 'TechCrunch',
-                    'time': 'Il y a 2 heures',
-                    'type': 'technology',
-                    'priority': 'medium'
-                },
-                {
-                    'id': 4,
-                    'title': 'Commodities market responds to supply chain updates',
-                    'description': 'Raw material prices fluctuate based on global supply and demand dynamics.',
-                    'source': 'MarketWatch',
-                    'time': 'Il y a 3 heures',
-                    'type': 'commodity',
-                    'priority': 'low'
-                },
-                {
-                    'id': 5,
-                    'title': 'AI analysis predicts continued market adaptation',
-                    'description': 'Artificial intelligence models suggest potential opportunities in current market conditions.',
-                    'source': 'AI Analysis',
-                    'time': 'Il y a 4 heures',
-                    'type': 'analysis',
-                    'priority': 'medium'
-                }
-            ]
+            return list(MOCK_BASIC_NEWS)
 
+    def _parse_rss_feed(self, feed_url):
+        """
+        Download one RSS feed through the shared session and format its latest entries
+        """
+        response = self._session.get(feed_url, timeout=RSS_TIMEOUT)
+        feed = feedparser.parse(response.content)
+        
+        # Extract latest news items
+        news_items = []
+        for i, entry in enumerate(feed.entries[:5]):  # Take top 5
+            # Skip entries without titles
+            if not hasattr(entry, 'title'):
+                continue
+            
+            # Determine article type based on title/content
+            article_type = self._classify_article_type(entry.title)
+            
+            # Safely get description/summary
+            description = getattr(entry, 'summary', 'No description available')
+            if len(description) > 200:
+                description = description[:200] + '...'
+            
+            title = entry.title[:100] + '...' if len(entry.title) > 100 else entry.title
+            
+            news_item = {
+                'id': stable_id(title) + i,
+                'title': title,
+                'description': description,
+                'source': getattr(feed.feed, 'title', feed_url.split('/')[2]),
+                'time': 'Il y a quelques minutes',  # Approximate time
+                'type': article_type,
+                'priority': self._determine_priority(entry.title)
+            }
+            news_items.append(news_item)
+        
+        return news_items
 
     def _fetch_free_financial_news(self):
         """
         Fetch financial news from free sources
         """
         try:
-            # Try different free financial news sources
-            sources = [
-                'https://www.bloomberg.com/markets/api/bulk-time-series/price/GLOBAL-METALS?timeFrame=1_DAY',
-                'https://api.fiscaldata.treasury.gov/services/api/bulk-download/addresses',
-                # Using a mock response for demonstration
-            ]
-            
-            # For now, we'll use RSS feeds or alternative sources
-            # We'll try to fetch from RSS feeds
-            rss_sources = [
-                {'url': 'https://feeds.reuters.com/reuters/marketsnews', 'source': 'Reuters'},
-                {'url': 'https://www.ft.com/rss/markets', 'source': 'Financial Times'},
-                {'url': 'https://feeds.bbci.co.uk/news/business/rss.xml', 'source': 'BBC Business'},
-            ]
-            
             # Try to fetch from actual free financial news sources
-            try:
-                # Import feedparser here to parse RSS feeds
-                import feedparser
-                
-                # List of financial RSS feeds
-                rss_feeds = [
-                    'https://feeds.reuters.com/reuters/businessNews',  # Reuters business
-                    'https://feeds.reuters.com/reuters/marketsNews',   # Reuters markets
-                    'https://www.ft.com/rss/markets',                # Financial Times markets
-                    'https://feeds.bbci.co.uk/news/business/rss.xml', # BBC Business
-                ]
-                
-                for feed_url in rss_feeds:
-                    try:
-                        # Parse the RSS feed
-                        feed = feedparser.parse(feed_url)
-                        
-                        if feed.entries:
-                            # Extract latest news items
-                            news_items = []
-                            for i, entry in enumerate(feed.entries[:5]):  # Take top 5
-                                # Skip entries without titles
-                                if not hasattr(entry, 'title'):
-                                    continue
-                                
-                                # Determine article type based on title/content
-                                article_type = self._classify_article_type(entry.title)
-                                
-                                # Safely get description/summary
-                                description = getattr(entry, 'summary', 'No description available')
-                                if len(description) > 200:
-                                    description = description[:200] + '...'
-                                
-                                title = entry.title[:100] + '...' if len(entry.title) > 100 else entry.title
-                                
-                                news_item = {
-                                    'id': hash(title) % 1000000 + i,
-                                    'title': title,
-                                    'description': description,
-                                    'source': getattr(feed.feed, 'title', feed_url.split('/')[2]),
-                                    'time': 'Il y a quelques minutes',  # Approximate time
-                                    'type': article_type,
-                                    'priority': self._determine_priority(entry.title)
-                                }
-                                news_items.append(news_item)
-                            
-                            if news_items:
-                                return news_items
-                    except Exception as e:
-                        print(f"Error parsing RSS feed {feed_url}: {str(e)}")
-                        continue  # Try next feed
-            except ImportError:
-                print("feedparser not installed, using mock data")
+            if feedparser is not None:
+                # Fetch all feeds at once and use the first one that yields articles
+                executor = ThreadPoolExecutor(max_workers=len(RSS_FEEDS))
+                try:
+                    futures = {executor.submit(self._parse_rss_feed, feed_url): feed_url for feed_url in RSS_FEEDS}
+                    for future in as_completed(futures, timeout=RSS_TIMEOUT + 1):
+                        try:
+                            news_items = future.result()
+                        except Exception as e:
+                            print(f"Error parsing RSS feed {futures[future]}: {str(e)}")
+                            continue  # Wait for the next feed
+                        if news_items:
+                            return news_items
+                except FuturesTimeoutError:
+                    print("Timed out waiting for RSS feeds")
+                finally:
+                    # Don't wait on slower feeds once we have a result
+                    executor.shutdown(wait=False, cancel_futures=True)
             
             # If all RSS feeds fail, return mock data
-            mock_alt_news = [
-                {
-                    'id': 101,
-                    'title': 'Global markets show mixed signals as inflation concerns persist',
-                    'description': 'Equity markets fluctuated in early trading as investors weigh central bank policies against economic data.',
-                    'source': 'Financial News',
-                    'time': 'Il y a 10 minutes',
-                    'type': 'general',
-                    'priority': 'medium'
-                },
-                {
-                    'id': 102,
-                    'title': 'Cryptocurrency markets stabilize after recent volatility',
-                    'description': 'Major cryptocurrencies show signs of stabilization following regulatory clarity announcements.',
-                    'source': 'Crypto Daily',
-                    'time': 'Il y a 25 minutes',
-                    'type': 'crypto',
-                    'priority': 'medium'
-                },
-                {
-                    'id': 103,
-                    'title': 'Energy sector gains as oil prices rise amid geopolitical tensions',
-                    'description': 'Energy stocks rally on increased crude oil prices driven by supply concerns.',
-                    'source': 'Energy Report',
-                    'time': 'Il y a 40 minutes',
-                    'type': 'commodity',
-                    'priority': 'high'
-                },
-                {
-                    'id': 104,
-                    'title': 'Tech giants post strong earnings, driving sector optimism',
-                    'description': 'Leading technology companies exceed quarterly expectations, boosting investor sentiment.',
-                    'source': 'Tech Finance',
-                    'time': 'Il y a 1 heure',
-                    'type': 'technology',
-                    'priority': 'high'
-                },
-                {
-                    'id': 105,
-                    'title': 'AI-driven trading platforms gain traction among retail investors',
-                    'description': 'Algorithmic trading solutions powered by artificial intelligence see increased adoption.',
-                    'source': 'AI Finance',
-                    'time': 'Il y a 2 heures',
-                    'type': 'analysis',
-                    'priority': 'medium'
-                }
-            ]
-            return mock_alt_news
+            return list(MOCK_ALT_NEWS)
             
         except Exception as e:
             print(f"Error fetching free financial news: {str(e)}")
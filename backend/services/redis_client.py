@@ -0,0 +1,27 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_redis_client():
+    """
+    Create a Redis client when REDIS_URL is configured, otherwise return None
+    so callers fall back to their in-process caches
+    """
+    redis_url = os.getenv('REDIS_URL')
+    if not redis_url:
+        return None
+
+    try:
+        import redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed")
+        return None
+
+    # Connections are opened lazily on first command
+    return redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+
+
+# Shared client for all modules in this process (None when Redis is disabled)
+redis_client = create_redis_client()
@@ -1,128 +1,273 @@
-from models import UserChallenge, Trade, db
+import logging
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from models import UserChallenge, Trade, DailyBalanceSnapshot, db, refresh_challenge_stats
 from datetime import datetime, timedelta
-from sqlalchemy import and_
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from services import leaderboard
 
 # Import the new challenge engine service
-from services.challenge_engine import update_challenge_status, calculate_daily_change, calculate_total_change, get_challenge_performance_metrics
+from services.challenge_engine import update_challenge_status, calculate_daily_change, calculate_total_change, get_challenge_performance_metrics, start_of_utc_day
 
+logger = logging.getLogger(__name__)
 
-def calculate_daily_loss(challenge_id):
+# Status re-checks after trades run on a background worker (ASYNC_STATUS_UPDATES=0
+# keeps them on the request thread). Ids queued within one window are coalesced,
+# so a burst of trades on a challenge costs a single update.
+ASYNC_STATUS_UPDATES = os.environ.get('ASYNC_STATUS_UPDATES', '1') == '1'
+STATUS_UPDATE_WINDOW = 0.5  # seconds
+status_update_queue = queue.Queue()
+pending_status_updates = set()
+pending_lock = threading.Lock()
+status_worker = None
+
+
+def calculate_daily_loss(challenge):
     """
     Calculate the daily loss for a challenge by comparing the opening balance 
     (first trade of the day) with the closing balance (last trade of the day)
     """
-    # Get all trades for this challenge ordered by timestamp
-    trades = Trade.query.filter_by(challenge_id=challenge_id).order_by(Trade.timestamp).all()
+    start_of_day = start_of_utc_day()
+    today = start_of_day.date()
     
-    if not trades:
+    # Only today's trades matter, so count them with an index range scan
+    # instead of loading and grouping the whole trade history
+    today_trades = db.session.query(func.count(Trade.id)).filter(
+        Trade.challenge_id == challenge.id,
+        Trade.timestamp >= start_of_day
+    ).scalar()
+    
+    if not today_trades:
         return 0.0
     
-    # Group trades by date
-    trades_by_date = {}
-    for trade in trades:
-        date = trade.timestamp.date()
-        if date not in trades_by_date:
-            trades_by_date[date] = []
-        trades_by_date[date].append(trade)
-    
-    # Get today's trades to calculate daily P&L
-    today = datetime.utcnow().date()
-    if today in trades_by_date:
-        today_trades = trades_by_date[today]
-        
-        # Find opening balance (balance before first trade of the day)
-        # We need to look at the balance at the start of the day
-        challenge = UserChallenge.query.get(challenge_id)
-        
-        # Calculate the opening balance for today based on previous day's close
-        # For simplicity, we'll calculate based on the first trade of the day vs last trade of the day
-        first_trade = today_trades[0]
-        last_trade = today_trades[-1]
-        
-        # This is a simplified calculation - in reality you'd need to track P&L more precisely
-        # For now, let's calculate based on current balance vs what the balance was at start of day
-        
-        # We'll calculate based on current balance vs initial balance adjusted for today's activity
-        # More precise calculation would require tracking running balances
-        start_of_day_balance = get_start_of_day_balance(challenge_id, today)
-        current_balance = challenge.current_balance
-        
-        daily_change = current_balance - start_of_day_balance
-        daily_change_percentage = (daily_change / start_of_day_balance) * 100
-        
-        return daily_change_percentage
+    # Find opening balance (balance before first trade of the day)
+    start_of_day_balance = get_start_of_day_balance(challenge, today)
+    current_balance = challenge.current_balance
     
-    return 0.0
+    daily_change = current_balance - start_of_day_balance
+    daily_change_percentage = (daily_change / start_of_day_balance) * 100
+    
+    return daily_change_percentage
 
 
-def get_start_of_day_balance(challenge_id, date):
+def get_start_of_day_balance(challenge, date):
     """
     Calculate the balance at the start of the given day
     """
-    challenge = UserChallenge.query.get(challenge_id)
-    
-    # Get all trades before the given date
-    trades_before_date = Trade.query.filter(
-        and_(
-            Trade.challenge_id == challenge_id,
-            Trade.timestamp < datetime.combine(date, datetime.min.time())
-        )
-    ).order_by(Trade.timestamp).all()
+    # Recorded by check_and_update_after_trade at the first trade of the day
+    open_balance = db.session.query(DailyBalanceSnapshot.open_balance).filter_by(
+        challenge_id=challenge.id, date=date
+    ).scalar()
+    if open_balance is not None:
+        return open_balance
     
-    if not trades_before_date:
-        # If no trades before this date, return the initial balance
-        return challenge.initial_balance
-    
-    # In a real implementation, you'd need to track the running balance
-    # For now, returning initial balance as placeholder
+    # No snapshot (e.g. trades made before snapshots existed): use the initial balance
     return challenge.initial_balance
 
 
-def update_challenge_status(challenge_id):
+def record_day_open_balance(challenge_id, date, balance):
+    """
+    Store the balance before the first trade of the day; later trades keep the existing row
+    """
+    insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    db.session.execute(
+        insert(DailyBalanceSnapshot)
+        .values(challenge_id=challenge_id, date=date, open_balance=balance)
+        .on_conflict_do_nothing(index_elements=['challenge_id', 'date'])
+    )
+
+
+def status_rules(daily_loss_percentage):
+    """
+    CASE expression giving a challenge's new status; daily_loss_percentage is a SQL
+    expression (a bound value for one challenge, or a per-row expression for a batch)
+    """
+    return case(
+        (daily_loss_percentage < -UserChallenge.max_daily_loss, 'failed'),  # Daily loss > max_daily_loss%
+        (UserChallenge.profit_pct < -UserChallenge.max_total_loss, 'failed'),  # Total loss > max_total_loss%
+        (UserChallenge.profit_pct >= UserChallenge.profit_target, 'funded'),  # Profit reaches profit_target%
+        else_=UserChallenge.status
+    )
+
+
+def update_challenge_status(challenge):
     """
     Check the challenge status based on the rules:
     - Daily loss > max_daily_loss -> Status = 'FAILED'
     - Total loss > max_total_loss -> Status = 'FAILED'
     - Profit reaches profit_target -> Status = 'FUNDED'
+    challenge is a loaded UserChallenge (routes pass the one they already have) or its id
     """
-    challenge = UserChallenge.query.get(challenge_id)
-    if not challenge:
-        return False
-    
-    # Calculate total percentage change
-    total_change_percentage = ((challenge.current_balance - challenge.initial_balance) / challenge.initial_balance) * 100
-    
-    # Calculate daily loss
-    daily_loss_percentage = calculate_daily_loss(challenge_id)
-    
-    # Apply the rules based on challenge parameters
-    print(f"DEBUG: Challenge {challenge_id} - Current balance: {challenge.current_balance}, Initial balance: {challenge.initial_balance}")
-    print(f"DEBUG: Total change percentage: {total_change_percentage}, Max total loss: {challenge.max_total_loss}")
-    print(f"DEBUG: Daily loss percentage: {daily_loss_percentage}, Max daily loss: {challenge.max_daily_loss}")
-    
-    if daily_loss_percentage < -challenge.max_daily_loss:  # Daily loss > max_daily_loss%
-        challenge.status = 'failed'
-        challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} failed due to daily loss")
-    elif total_change_percentage < -challenge.max_total_loss:  # Total loss > max_total_loss%
-        challenge.status = 'failed'
-        challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} failed due to total loss")
-    elif total_change_percentage >= challenge.profit_target:  # Profit reaches profit_target%
-        challenge.status = 'funded'
-        challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} funded due to profit target")
-    # Otherwise, status remains 'active'
-    else:
-        print(f"DEBUG: Challenge {challenge_id} status remains active")
+    if not isinstance(challenge, UserChallenge):
+        # Load the challenge once (usually an identity-map hit) and pass it to the helpers
+        challenge = db.session.get(UserChallenge, challenge)
+        if not challenge:
+            return False
+    challenge_id = challenge.id
+    
+    # Failed and funded are final outcomes; there is nothing left to evaluate
+    if challenge.status != 'active':
+        return True
+    
+    # Daily loss needs the day's opening snapshot, so it is computed first and
+    # passed into the UPDATE; the total-change rules are evaluated by the database
+    daily_loss_percentage = calculate_daily_loss(challenge)
+    
+    new_status = status_rules(literal(daily_loss_percentage))
+    
+    # Apply the rules in one UPDATE that only touches the row when the status
+    # changes; otherwise, status remains unchanged and there is nothing to commit
+    updated = db.session.execute(
+        update(UserChallenge)
+        .where(UserChallenge.id == challenge_id, new_status != UserChallenge.status)
+        .values(status=new_status, end_date=datetime.utcnow())
+        .returning(UserChallenge.id, UserChallenge.status, UserChallenge.current_balance, UserChallenge.initial_balance)
+    ).first()
+    
+    if updated is None:
+        logger.debug("Challenge %s - Daily loss percentage: %s, status unchanged",
+                     challenge_id, daily_loss_percentage)
+        return True
+    
+    # Bulk UPDATEs skip the mapper events, so refresh the leaderboard roll-up here
+    refresh_challenge_stats(db.session.connection(), UserChallenge.id == challenge_id)
+    
+    # %-style arguments are only formatted when DEBUG logging is enabled
+    logger.debug("Challenge %s - Current balance: %s, Initial balance: %s",
+                 challenge_id, updated.current_balance, updated.initial_balance)
+    logger.debug("Challenge %s - Daily loss percentage: %s, Status: %s",
+                 challenge_id, daily_loss_percentage, updated.status)
     
     db.session.commit()
+    leaderboard.record_challenge(updated)
     return True
 
 
-def check_and_update_after_trade(trade):
+def update_challenge_statuses(challenge_ids):
     """
-    Function to be called after each trade to check and update the challenge status
+    Batch form of update_challenge_status: evaluates every active challenge in
+    challenge_ids in a single UPDATE, with the daily loss computed per row in SQL
+    Returns the number of challenges whose status changed
+    """
+    start_of_day = start_of_utc_day()
+    
+    # Same inputs as calculate_daily_loss: the day's opening snapshot (or the initial
+    # balance without one), and no daily loss at all until the first trade of the day
+    day_open_balance = func.coalesce(
+        select(DailyBalanceSnapshot.open_balance).where(
+            DailyBalanceSnapshot.challenge_id == UserChallenge.id,
+            DailyBalanceSnapshot.date == start_of_day.date()
+        ).scalar_subquery(),
+        UserChallenge.initial_balance
+    )
+    traded_today = select(Trade.id).where(
+        Trade.challenge_id == UserChallenge.id,
+        Trade.timestamp >= start_of_day
+    ).exists()
+    daily_loss_percentage = case(
+        (traded_today, (UserChallenge.current_balance - day_open_balance) / func.nullif(day_open_balance, 0) * 100),
+        else_=0.0
+    )
+    new_status = status_rules(daily_loss_percentage)
+    
+    updated = db.session.execute(
+        update(UserChallenge)
+        .where(UserChallenge.id.in_(challenge_ids), UserChallenge.status == 'active', new_status != UserChallenge.status)
+        .values(status=new_status, end_date=datetime.utcnow())
+        .returning(UserChallenge.id, UserChallenge.status, UserChallenge.current_balance, UserChallenge.initial_balance)
+    ).all()
+    
+    if not updated:
+        return 0
+    
+    # Bulk UPDATEs skip the mapper events, so refresh the leaderboard roll-up here
+    refresh_challenge_stats(db.session.connection(), UserChallenge.id.in_([row.id for row in updated]))
+    db.session.commit()
+    for row in updated:
+        logger.debug("Challenge %s - Status: %s", row.id, row.status)
+        leaderboard.record_challenge(row)
+    return len(updated)
+
+
+def check_and_update_after_trade(trade, balance_before=None):
+    """
+    Function to be called after each trade to commit it and check and update the challenge status
+    trade is the new trade (an ORM object or an INSERT ... RETURNING row)
+    balance_before is the challenge balance before this trade's P&L was applied
+    Returns True when the status check was queued rather than run
     """
     challenge_id = trade.challenge_id
-    update_challenge_status(challenge_id)
\ No newline at end of file
+    
+    challenge = db.session.get(UserChallenge, challenge_id)
+    if balance_before is not None:
+        record_day_open_balance(challenge_id, trade.timestamp.date(), balance_before)
+    # Trades inserted through Core skip the mapper events that keep challenge_stats current
+    refresh_challenge_stats(db.session.connection(), UserChallenge.id == challenge_id)
+    
+    db.session.commit()
+    leaderboard.record_challenge(challenge)
+    
+    return schedule_status_update(challenge_id)
+
+
+def schedule_status_update(challenge_id):
+    """
+    Re-check a challenge's status: queued for the background worker when
+    ASYNC_STATUS_UPDATES is on, otherwise right away. Returns True if it was queued
+    """
+    if ASYNC_STATUS_UPDATES:
+        queue_status_update(challenge_id)
+        return True
+    update_challenge_status(challenge_id)
+    return False
+
+
+def queue_status_update(challenge_id):
+    """
+    Schedule a status re-check for a challenge unless one is already pending
+    """
+    global status_worker
+    with pending_lock:
+        if challenge_id in pending_status_updates:
+            return
+        pending_status_updates.add(challenge_id)
+        # Started lazily so every (forked) worker process runs its own thread
+        if status_worker is None or not status_worker.is_alive():
+            status_worker = threading.Thread(
+                target=run_status_updates,
+                args=(current_app._get_current_object(),),
+                name='challenge-status-updates',
+                daemon=True
+            )
+            status_worker.start()
+    status_update_queue.put(challenge_id)
+
+
+def run_status_updates(app):
+    """
+    Background loop: wait for queued challenge ids, let the window fill up,
+    then evaluate the distinct challenges in one batch
+    """
+    while True:
+        challenge_ids = [status_update_queue.get()]
+        time.sleep(STATUS_UPDATE_WINDOW)
+        while True:
+            try:
+                challenge_ids.append(status_update_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        with pending_lock:
+            pending_status_updates.difference_update(challenge_ids)
+        
+        with app.app_context():
+            try:
+                update_challenge_statuses(set(challenge_ids))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error updating status for challenges {challenge_ids}: {str(e)}")
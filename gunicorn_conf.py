@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for TradeSense
+Usage: gunicorn -c gunicorn_conf.py wsgi:application
+"""
+import fcntl
+import multiprocessing
+import os
+import tempfile
+
+# Bind to the port provided by the platform (Railway/Render) or default to 5000
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# gevent workers yield on socket I/O, so yfinance/scraping/DB waits overlap
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * multiprocessing.cpu_count() + 1))
+worker_connections = 1000
+
+# Import the app once in the master so workers share its module memory copy-on-write
+preload_app = True
+
+# Recycle workers periodically to bound memory growth
+max_requests = 500
+max_requests_jitter = 200
+
+timeout = 30
+accesslog = '-'
+errorlog = '-'
+
+# Don't let every worker start the price scheduler when the app is imported;
+# post_fork elects one instead (an explicit RUN_SCHEDULER still wins)
+os.environ.setdefault('RUN_SCHEDULER', '0')
+scheduler_lock_path = os.path.join(tempfile.gettempdir(), f"tradesense-scheduler-{os.environ.get('PORT', 5000)}.lock")
+
+
+def post_fork(server, worker):
+    """
+    Run the price scheduler in the first worker that takes the lock; the lock is
+    released when that worker exits, so its replacement takes over
+    """
+    if os.environ.get('ENABLE_REALTIME', '1') != '1' or os.environ['RUN_SCHEDULER'] == '1':
+        return
+    
+    lock_file = open(scheduler_lock_path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return
+    
+    worker.scheduler_lock = lock_file  # Hold the lock for the worker's lifetime
+    import real_time_data
+    real_time_data.start_scheduler()
+    server.log.info("Worker %s runs the price scheduler", worker.pid)
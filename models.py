@@ -1,9 +1,22 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import event, func, inspect, select, text, true
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
+# pbkdf2 work factor for new password hashes; existing hashes keep the one they were made with
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '600000'))
+PASSWORD_HASH_METHOD = f'pbkdf2:sha256:{PASSWORD_HASH_ITERATIONS}'
+
+# Checked against when a login names an unknown user, so the response takes as
+# long as a wrong password and doesn't reveal which usernames exist
+DUMMY_PASSWORD_HASH = generate_password_hash('dummy-password', method=PASSWORD_HASH_METHOD)
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -17,11 +30,15 @@ class User(db.Model):
     challenges = db.relationship('UserChallenge', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def to_dict(self):
+        """Public fields returned by the register, login and profile endpoints"""
+        return {'id': self.id, 'username': self.username, 'email': self.email}
+    
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -42,6 +59,11 @@ class UserChallenge(db.Model):
     max_total_loss = db.Column(db.Float, default=10.0, nullable=False)  # Maximum total loss percentage (e.g., 10%)
     profit_target = db.Column(db.Float, default=20.0, nullable=False)  # Profit target percentage to become funded (e.g., 20%)
     
+    # Profit as a percentage of the initial balance, maintained by the database on every write
+    profit_pct = db.Column(db.Float, db.Computed(
+        '(current_balance - initial_balance) / NULLIF(initial_balance, 0) * 100', persisted=True
+    ))
+    
     # Relationship with Trade
     trades = db.relationship('Trade', backref='challenge', lazy=True)
     
@@ -49,6 +71,10 @@ class UserChallenge(db.Model):
         return f'<UserChallenge {self.id} - {self.status}>'
 
 
+# Backs the per-user challenge lists and the "already has an active challenge" probe
+db.Index('ix_user_challenges_user_status', UserChallenge.user_id, UserChallenge.status)
+
+
 class Trade(db.Model):
     __tablename__ = 'trades'
     
@@ -58,6 +84,142 @@ class Trade(db.Model):
     entry_price = db.Column(db.Float, nullable=False)
     type = db.Column(db.String(10), nullable=False)  # buy/sell
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    running_balance = db.Column(db.Float, nullable=True)  # Challenge balance right after this trade
+    pnl = db.Column(db.Float, nullable=True)  # Profit/loss this trade applied to the balance
+    
+    def __repr__(self):
+        return f'<Trade {self.asset_name} - {self.type}>'
+
+
+# Serves per-challenge trade lists and the daily-window queries in challenge_logic
+db.Index('ix_trades_challenge_timestamp', Trade.challenge_id, Trade.timestamp.desc())
+# Keyset pagination of a challenge's trades (newest id first)
+db.Index('ix_trades_challenge_id_id', Trade.challenge_id, Trade.id)
+# Finds the latest opposite-side trade for an asset when create_trade computes P&L
+db.Index('ix_trades_challenge_asset_type_timestamp', Trade.challenge_id, Trade.asset_name, Trade.type, Trade.timestamp.desc())
+
+
+class DailyBalanceSnapshot(db.Model):
+    __tablename__ = 'daily_balance_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('challenge_id', 'date', name='uq_daily_balance_snapshots_challenge_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('user_challenges.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    open_balance = db.Column(db.Float, nullable=False)  # Balance before the first trade of the day
+    
+    def __repr__(self):
+        return f'<DailyBalanceSnapshot {self.challenge_id} - {self.date}>'
+
+
+class ChallengeStats(db.Model):
+    """Leaderboard roll-up, one row per challenge, kept current by the mapper events below"""
+    __tablename__ = 'challenge_stats'
+    
+    challenge_id = db.Column(db.Integer, db.ForeignKey('user_challenges.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    username = db.Column(db.String(80), nullable=False)
+    profit_pct = db.Column(db.Float, nullable=False)
+    total_profit = db.Column(db.Float, nullable=False)
+    trade_count = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
     
     def __repr__(self):
-        return f'<Trade {self.asset_name} - {self.type}>'
\ No newline at end of file
+        return f'<ChallengeStats {self.challenge_id} - {self.profit_pct}>'
+
+
+# The leaderboard reads the top rows per status straight off this index
+db.Index('ix_challenge_stats_status_profit', ChallengeStats.status, ChallengeStats.profit_pct.desc())
+
+
+def refresh_challenge_stats(connection, *criteria):
+    """
+    Recompute the challenge_stats rows for the challenges matching criteria
+    (all challenges when none are given) and upsert them
+    """
+    stats = select(
+        UserChallenge.id,
+        UserChallenge.user_id,
+        User.username,
+        func.coalesce(UserChallenge.profit_pct, 0.0),
+        UserChallenge.current_balance - UserChallenge.initial_balance,
+        func.count(Trade.id),
+        UserChallenge.status
+    ).join(User, User.id == UserChallenge.user_id) \
+     .outerjoin(Trade, Trade.challenge_id == UserChallenge.id) \
+     .where(*criteria or (true(),)) \
+     .group_by(UserChallenge.id, User.id)
+    
+    columns = ['challenge_id', 'user_id', 'username', 'profit_pct', 'total_profit', 'trade_count', 'status']
+    insert = postgresql_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    upsert = insert(ChallengeStats).from_select(columns, stats)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['challenge_id'],
+        set_={column: upsert.excluded[column] for column in columns[1:]}
+    )
+    connection.execute(upsert)
+
+
+@event.listens_for(UserChallenge, 'after_insert')
+@event.listens_for(UserChallenge, 'after_update')
+def sync_challenge_stats(mapper, connection, target):
+    refresh_challenge_stats(connection, UserChallenge.id == target.id)
+
+
+@event.listens_for(Trade, 'before_delete')
+def reverse_trade_pnl(mapper, connection, target):
+    """Take a deleted trade's P&L back out of the challenge balance, in the same transaction"""
+    if target.pnl:
+        connection.execute(
+            UserChallenge.__table__.update()
+            .where(UserChallenge.__table__.c.id == target.challenge_id)
+            .values(current_balance=UserChallenge.__table__.c.current_balance - target.pnl)
+        )
+
+
+@event.listens_for(Trade, 'after_insert')
+@event.listens_for(Trade, 'after_delete')
+def sync_trade_challenge_stats(mapper, connection, target):
+    refresh_challenge_stats(connection, UserChallenge.id == target.challenge_id)
+
+
+def populate_challenge_stats():
+    """
+    Fill challenge_stats from existing challenges the first time it is created
+    """
+    with db.engine.begin() as connection:
+        if connection.execute(select(ChallengeStats.challenge_id).limit(1)).first() is None:
+            refresh_challenge_stats(connection)
+
+
+def create_missing_indexes():
+    """
+    Create model indexes that db.create_all() skips on tables that already exist
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+def add_missing_columns():
+    """
+    create_all() doesn't alter existing tables, so add columns introduced after a
+    database was created (there are no migrations; new columns must be nullable)
+    """
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_ddl = str(CreateColumn(column).compile(dialect=db.engine.dialect))
+                if column.computed is not None and db.engine.dialect.name == 'sqlite':
+                    # SQLite can only add VIRTUAL generated columns to an existing table
+                    column_ddl = column_ddl.replace(' STORED', ' VIRTUAL')
+                connection.execute(text(f'ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {column_ddl}'))
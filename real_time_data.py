@@ -1,39 +1,78 @@
 import yfinance as yf
+import os
 import threading
 import time
 from datetime import datetime
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
+import json
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 
 # Import the new morocco scraper service
 from services.morocco_scraper import get_morocco_stock_price
+from services.redis_client import redis_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Cache for storing the latest prices
-price_cache = {}
+# Cache for storing the latest prices; entries expire on their own after 30 seconds
+PRICE_CACHE_TTL = 30
+price_cache = TTLCache(maxsize=1024, ttl=PRICE_CACHE_TTL)
 cache_lock = threading.Lock()
 
+# Shared pool for multi-ticker lookups; cache misses are network-bound, so they overlap
+MAX_PRICE_WORKERS = 16
+price_executor = ThreadPoolExecutor(max_workers=MAX_PRICE_WORKERS, thread_name_prefix='price-fetch')
+
+# Only the last close is used, so skip adjustments, dividend/split columns and extended hours
+HISTORY_OPTIONS = {'period': '1d', 'interval': '1m', 'auto_adjust': False, 'prepost': False, 'actions': False}
+
+# Symbol dispatch tables
+MOROCCAN_SYMBOLS = frozenset({'IAM', 'ATW'})
+CRYPTO_SUFFIXES = ('-USD', '-BTC')
+CRYPTO_BASES = frozenset({'BTC', 'ETH', 'XRP', 'LTC', 'BCH'})
+
+# Default fallback prices for major cryptocurrencies when yfinance has no quote
+CRYPTO_DEFAULT_PRICES = {
+    'BTC-USD': 45000.00,
+    'ETH-USD': 2500.00,
+    'XRP-USD': 0.50,
+    'LTC-USD': 70.00,
+    'BCH-USD': 300.00
+}
+CRYPTO_DEFAULT_FALLBACK = 100.00
+
+# Prices returned when the crypto lookup itself fails
+CRYPTO_ERROR_PRICES = {
+    'BTC-USD': 43000.00,
+    'ETH-USD': 2300.00,
+    'XRP-USD': 0.45,
+    'LTC-USD': 65.00,
+    'BCH-USD': 280.00
+}
+CRYPTO_ERROR_FALLBACK = 80.00
+
 def get_international_price(ticker):
     """
     Get real-time price for international assets using yfinance
     """
+    symbol = ticker.upper()
     try:
         # Handle cryptocurrency tickers specially
-        if ticker.upper().endswith('-USD') or ticker.upper().endswith('-BTC') or ticker.upper() in ['BTC', 'ETH', 'XRP', 'LTC', 'BCH']:
+        if symbol.endswith(CRYPTO_SUFFIXES) or symbol in CRYPTO_BASES:
             # For cryptocurrencies, use a different approach
             return get_crypto_price(ticker)
         
         ticker_obj = yf.Ticker(ticker)
-        data = ticker_obj.history(period="1d", interval="1m")  # Get last minute data
+        data = ticker_obj.history(**HISTORY_OPTIONS)  # Get last minute data
         
         if not data.empty:
             latest_price = data['Close'].iloc[-1]
             return {
-                'symbol': ticker.upper(),
+                'symbol': symbol,
                 'price': round(latest_price, 2),
                 'timestamp': datetime.now().isoformat(),
                 'source': 'international'
@@ -42,7 +81,7 @@ def get_international_price(ticker):
             # Fallback to fast_info if history doesn't work
             fast_info = ticker_obj.fast_info
             return {
-                'symbol': ticker.upper(),
+                'symbol': symbol,
                 'price': round(fast_info.get('lastPrice', fast_info.get('previousClose', 0)), 2),
                 'timestamp': datetime.now().isoformat(),
                 'source': 'international'
@@ -50,7 +89,7 @@ def get_international_price(ticker):
     except Exception as e:
         logger.error(f"Error fetching international price for {ticker}: {str(e)}")
         return {
-            'symbol': ticker.upper(),
+            'symbol': symbol,
             'price': 0,
             'timestamp': datetime.now().isoformat(),
             'source': 'international',
@@ -69,7 +108,7 @@ def get_crypto_price(ticker):
             crypto_ticker = f"{crypto_ticker}-USD"
         
         ticker_obj = yf.Ticker(crypto_ticker)
-        data = ticker_obj.history(period="1d", interval="1m")
+        data = ticker_obj.history(**HISTORY_OPTIONS)
         
         if not data.empty:
             latest_price = data['Close'].iloc[-1]
@@ -85,14 +124,7 @@ def get_crypto_price(ticker):
             price = fast_info.get('lastPrice', fast_info.get('previousClose', 0))
             if price == 0:
                 # Default fallback prices for major cryptocurrencies
-                default_prices = {
-                    'BTC-USD': 45000.00,
-                    'ETH-USD': 2500.00,
-                    'XRP-USD': 0.50,
-                    'LTC-USD': 70.00,
-                    'BCH-USD': 300.00
-                }
-                price = default_prices.get(crypto_ticker, 100.00)  # Default fallback
+                price = CRYPTO_DEFAULT_PRICES.get(crypto_ticker, CRYPTO_DEFAULT_FALLBACK)
             
             return {
                 'symbol': crypto_ticker,
@@ -107,14 +139,7 @@ def get_crypto_price(ticker):
         if not crypto_symbol.endswith('-USD'):
             crypto_symbol = f"{crypto_symbol}-USD"
         
-        default_prices = {
-            'BTC-USD': 43000.00,
-            'ETH-USD': 2300.00,
-            'XRP-USD': 0.45,
-            'LTC-USD': 65.00,
-            'BCH-USD': 280.00
-        }
-        default_price = default_prices.get(crypto_symbol, 80.00)
+        default_price = CRYPTO_ERROR_PRICES.get(crypto_symbol, CRYPTO_ERROR_FALLBACK)
         
         return {
             'symbol': crypto_symbol,
@@ -167,61 +192,191 @@ def get_moroccan_price(symbol):
         }
 
 
+def fetch_price(symbol):
+    """
+    Fetch fresh data for a symbol from its upstream source (no caching)
+    """
+    ticker_upper = symbol.upper()
+    
+    # Check if it's a Moroccan stock
+    if ticker_upper in MOROCCAN_SYMBOLS:
+        return get_moroccan_price(ticker_upper)
+    # Assume it's an international stock
+    return get_international_price(ticker_upper)
+
+
 def get_cached_price(symbol):
     """
     Get price from cache if available, otherwise fetch fresh data
     """
+    # TTLCache drops stale entries itself; the lock only guards the lookup
+    # (expiry mutates the cache, so it isn't safe to read unlocked)
     with cache_lock:
-        if symbol in price_cache:
-            # Check if cache is still fresh (less than 30 seconds old)
-            cached_time = datetime.fromisoformat(price_cache[symbol]['timestamp'])
-            if (datetime.now() - cached_time).seconds < 30:
-                return price_cache[symbol]
+        cached = price_cache.get(symbol)
+    if cached:
+        return cached
     
-    # Fetch fresh data
-    ticker_upper = symbol.upper()
+    # Shared cache so every Gunicorn worker reuses the same fetch
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(f"price:{symbol}")
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            logger.debug(f"Redis price lookup failed for {symbol}: {str(e)}")
     
-    # Check if it's a Moroccan stock
-    if ticker_upper in ['IAM', 'ATW']:
-        data = get_moroccan_price(ticker_upper)
-    else:
-        # Assume it's an international stock
-        data = get_international_price(ticker_upper)
+    data = fetch_price(symbol)
     
     # Update cache
-    with cache_lock:
-        price_cache[symbol] = data
+    store_price(symbol, data)
     
     return data
 
 
+def get_cached_prices(tickers):
+    """
+    Get prices for several tickers at once: local cache first, then one Redis MGET
+    for the rest, then concurrent upstream fetches for what's still missing.
+    Returns {ticker: price_data}
+    """
+    results = {}
+    misses = []
+    with cache_lock:
+        for ticker in tickers:
+            cached = price_cache.get(ticker)
+            if cached:
+                results[ticker] = cached
+            else:
+                misses.append(ticker)
+    misses = list(dict.fromkeys(misses))
+    
+    if misses and redis_client is not None:
+        try:
+            shared = redis_client.mget([f"price:{ticker}" for ticker in misses])
+        except Exception as e:
+            logger.debug(f"Redis price lookup failed for {misses}: {str(e)}")
+        else:
+            found = {ticker: json.loads(value) for ticker, value in zip(misses, shared) if value}
+            with cache_lock:
+                price_cache.update(found)
+            results.update(found)
+            misses = [ticker for ticker in misses if ticker not in found]
+    
+    if misses:
+        fetched = dict(zip(misses, price_executor.map(fetch_price, misses)))
+        store_prices(fetched)
+        results.update(fetched)
+    # Keep the caller's ticker order
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def store_price(symbol, data):
+    """
+    Save a price in the local cache and, when configured, the shared Redis cache
+    """
+    store_prices({symbol: data})
+
+
+def store_prices(prices):
+    """
+    Save several prices ({symbol: price_data}); Redis writes go out in one pipeline
+    """
+    with cache_lock:
+        price_cache.update(prices)
+    if redis_client is not None:
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for symbol, data in prices.items():
+                pipe.setex(f"price:{symbol}", PRICE_CACHE_TTL, json.dumps(data))
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Redis price store failed for {list(prices)}: {str(e)}")
+
+
 # The old threading approach is no longer needed since we're using APScheduler
-# The functionality is now handled by the scheduler jobs defined above
+# The functionality is now handled by the scheduler jobs defined below
 
 
-# Initialize the scheduler for periodic updates
-scheduler = BackgroundScheduler()
-scheduler.start()
+def get_international_prices(tickers):
+    """
+    Get the latest prices for several international tickers with one batched yfinance download
+    """
+    try:
+        df = yf.download(tickers, period='1d', interval='1m', progress=False, threads=True, group_by='ticker')
+    except Exception as e:
+        logger.error(f"Error downloading international prices for {tickers}: {str(e)}")
+        df = None
+    
+    timestamp = datetime.now().isoformat()
+    prices = {}
+    for ticker in tickers:
+        try:
+            closes = df[ticker]['Close'].dropna()
+            if closes.empty:
+                raise ValueError('no data')
+            symbol = ticker.upper()
+            prices[ticker] = {
+                'symbol': symbol,
+                'price': round(float(closes.iloc[-1]), 2),
+                'timestamp': timestamp,
+                'source': 'cryptocurrency' if symbol.endswith(CRYPTO_SUFFIXES) or symbol in CRYPTO_BASES else 'international'
+            }
+        except Exception:
+            # Fall back to the single-ticker lookup (history, then fast_info)
+            prices[ticker] = get_international_price(ticker)
+    
+    return prices
+
 
 # Schedule periodic updates for common symbols
+COMMON_SYMBOLS = ['AAPL', 'TSLA', 'BTC-USD', 'IAM', 'ATW']
+
 def update_common_prices():
-    common_symbols = ['AAPL', 'TSLA', 'BTC-USD', 'IAM', 'ATW']
-    for symbol in common_symbols:
+    # One batched download for the international symbols instead of a request per ticker
+    international = [symbol for symbol in COMMON_SYMBOLS if symbol not in MOROCCAN_SYMBOLS]
+    prices = get_international_prices(international)
+    for symbol in COMMON_SYMBOLS:
+        if symbol in MOROCCAN_SYMBOLS:
+            prices[symbol] = get_moroccan_price(symbol)
+    
+    for symbol, price_data in prices.items():
         try:
-            price_data = get_cached_price(symbol)
+            store_price(symbol, price_data)
             logger.info(f"Updated cache for {symbol}: {price_data['price']}")
         except Exception as e:
             logger.error(f"Error updating cache for {symbol}: {str(e)}")
 
-# Add job to update prices every 120 seconds to reduce rate-limit errors
-scheduler.add_job(
-    func=update_common_prices,
-    trigger="interval",
-    seconds=120,
-    id='price_updates',
-    name='Update common stock prices',
-    replace_existing=True
-)
+
+# Initialize the scheduler for periodic updates
+scheduler = BackgroundScheduler()
+
+
+def start_scheduler():
+    """
+    Start the periodic price refresh in this process (no-op if already running)
+    """
+    if scheduler.running:
+        return
+    
+    # Add job to update prices every 120 seconds to reduce rate-limit errors
+    scheduler.add_job(
+        func=update_common_prices,
+        trigger="interval",
+        seconds=120,
+        id='price_updates',
+        name='Update common stock prices',
+        replace_existing=True
+    )
+    scheduler.start()
+    
+    # Shut down the scheduler when exiting the app
+    atexit.register(lambda: scheduler.shutdown())
+
+
+# A single process runs the scheduler by default; under Gunicorn, gunicorn_conf.py
+# sets RUN_SCHEDULER=0 and starts it in one elected worker instead of all of them
+if os.environ.get('RUN_SCHEDULER', '1') == '1':
+    start_scheduler()
 
 # Import news service
 try:
@@ -253,6 +408,3 @@ except ImportError:
             ]
     
     news_service = NewsService()
-
-# Shut down the scheduler when exiting the app
-atexit.register(lambda: scheduler.shutdown())
\ No newline at end of file
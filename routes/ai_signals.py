@@ -1,64 +1,113 @@
 from flask import Blueprint, request, jsonify
 import random
+import numpy as np
+from dataclasses import dataclass
 from datetime import datetime
-from real_time_data import get_cached_price
+from real_time_data import get_cached_price, get_cached_prices
 
 ai_signals_bp = Blueprint('ai_signals', __name__)
 
 # Mock AI signals data - in a real application, this would connect to an ML model
 AI_SIGNALS_DB = {}
 
-def generate_ai_signal(symbol, current_price):
+
+@dataclass(slots=True)
+class SignalIndicators:
+    volatility: float
+    momentum: float
+    rsi: float
+    macd: float
+
+
+@dataclass(slots=True)
+class Signal:
+    """AI signal for one symbol; serialized field by field by the JSON provider"""
+    symbol: str
+    signal: str
+    confidence: float
+    recommendation: str
+    indicators: SignalIndicators
+    timestamp: str
+    price: float
+
+
+# Number of uniform [0, 1) draws consumed by one generate_ai_signal call
+SIGNAL_DRAWS = 9
+
+# Shared generator; numpy serializes access through the bit generator's lock
+signal_rng = np.random.default_rng()
+
+
+def draw_signal_randoms(count):
+    """
+    Draw the random inputs for `count` signals in one call (one row per signal)
+    """
+    return signal_rng.random((count, SIGNAL_DRAWS)).tolist()
+
+
+def uniform(draw, low, high):
+    """Scale a [0, 1) draw to [low, high)"""
+    return low + (high - low) * draw
+
+
+def generate_ai_signal(symbol, current_price, draws=None, timestamp=None):
     """
     Generate AI-based trading signals for a given symbol
+    draws is a row from draw_signal_randoms() and timestamp an ISO string shared by a
+    batch; a fresh draw / the current time is used when omitted
     """
+    if draws is None:
+        draws = draw_signal_randoms(1)[0]
+    if timestamp is None:
+        timestamp = datetime.now().isoformat()
+    
     # Possible signal types
     signal_types = ['buy', 'sell', 'hold']
     
     # Calculate some mock indicators based on price
-    volatility = random.uniform(0.5, 3.0)  # Volatility percentage
-    momentum = random.uniform(-2.0, 2.0)   # Momentum indicator
+    volatility = uniform(draws[0], 0.5, 3.0)  # Volatility percentage
+    momentum = uniform(draws[1], -2.0, 2.0)   # Momentum indicator
     
     # Determine signal based on mock analysis
     if momentum > 1.0 and volatility < 2.0:
         signal = 'buy'
-        confidence = round(random.uniform(70, 95), 2)
+        confidence = round(uniform(draws[2], 70, 95), 2)
         recommendation = 'Strong buy opportunity based on positive momentum and manageable volatility'
     elif momentum < -1.0 and volatility > 1.5:
         signal = 'sell'
-        confidence = round(random.uniform(70, 95), 2)
+        confidence = round(uniform(draws[2], 70, 95), 2)
         recommendation = 'Potential downturn detected with high volatility'
     elif abs(momentum) < 0.5:
         signal = 'hold'
-        confidence = round(random.uniform(60, 85), 2)
+        confidence = round(uniform(draws[2], 60, 85), 2)
         recommendation = 'Market appears stable, hold position'
     else:
-        signal = random.choice(signal_types)
-        confidence = round(random.uniform(50, 80), 2)
+        signal = signal_types[int(draws[3] * len(signal_types))]
+        confidence = round(uniform(draws[2], 50, 80), 2)
         recommendation = 'Mixed signals detected, exercise caution'
     
     # Special handling for Bitcoin
     if 'BTC' in symbol.upper():
         # Bitcoin tends to be more volatile
-        volatility = random.uniform(2.0, 5.0)
-        if signal == 'hold' and random.random() > 0.3:
-            signal = random.choice(['buy', 'sell'])
+        volatility = uniform(draws[4], 2.0, 5.0)
+        if signal == 'hold' and draws[5] > 0.3:
+            signal = 'buy' if draws[6] < 0.5 else 'sell'
             confidence = round(confidence * 0.9, 2)  # Slightly lower confidence for crypto
     
-    return {
-        'symbol': symbol,
-        'signal': signal,
-        'confidence': confidence,
-        'recommendation': recommendation,
-        'indicators': {
-            'volatility': round(volatility, 2),
-            'momentum': round(momentum, 2),
-            'rsi': round(random.uniform(30, 70), 2),  # Random RSI between 30-70
-            'macd': round(random.uniform(-1, 1), 2),  # Random MACD value
-        },
-        'timestamp': datetime.now().isoformat(),
-        'price': current_price
-    }
+    return Signal(
+        symbol=symbol,
+        signal=signal,
+        confidence=confidence,
+        recommendation=recommendation,
+        indicators=SignalIndicators(
+            volatility=round(volatility, 2),
+            momentum=round(momentum, 2),
+            rsi=round(uniform(draws[7], 30, 70), 2),  # Random RSI between 30-70
+            macd=round(uniform(draws[8], -1, 1), 2)  # Random MACD value
+        ),
+        timestamp=timestamp,
+        price=current_price
+    )
 
 @ai_signals_bp.route('/ai/signals/<ticker>', methods=['GET'])
 def get_ai_signal(ticker):
@@ -99,26 +148,37 @@ def get_multiple_ai_signals():
             return jsonify({'error': 'Tickers list is required'}), 400
         
         tickers = data['tickers']
-        results = {}
+        if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+            return jsonify({'error': 'Tickers must be a list of strings'}), 400
+        
+        # Normalize once; repeated tickers (in any case) share one lookup and one signal
+        symbols = {ticker: ticker.strip().upper() for ticker in tickers}
+        signals = {}
+        
+        # Fetch every price first; signal generation stays on this thread
+        price_map = get_cached_prices(list(dict.fromkeys(symbols.values())))
+        
+        # One batch of random draws and one timestamp for the whole request
+        draws = draw_signal_randoms(len(price_map))
+        timestamp = datetime.now().isoformat()
         
-        for ticker in tickers:
-            # Get current price for the ticker
-            price_data = get_cached_price(ticker)
-            
+        for (symbol, price_data), signal_draws in zip(price_map.items(), draws):
             if 'error' not in price_data:
                 # Generate AI signal based on current price
-                ai_signal = generate_ai_signal(ticker, price_data['price'])
-                results[ticker] = ai_signal
+                signals[symbol] = generate_ai_signal(symbol, price_data['price'], signal_draws, timestamp)
             else:
-                results[ticker] = {
-                    'symbol': ticker,
+                signals[symbol] = {
+                    'symbol': symbol,
                     'error': price_data['error'],
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
         
+        # Keep the response keyed by the tickers as the client sent them
+        results = {ticker: signals[symbol] for ticker, symbol in symbols.items()}
+        
         return jsonify({
             'signals': results,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         }), 200
         
     except Exception as e:
@@ -133,24 +193,28 @@ def get_popular_signals():
         popular_tickers = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN', 'META', 'NVDA', 'BTC-USD', 'ETH-USD', 'IAM', 'ATW']
         results = {}
         
-        for ticker in popular_tickers:
-            # Get current price for the ticker
-            price_data = get_cached_price(ticker)
-            
+        # Fetch every price first; signal generation stays on this thread
+        price_map = get_cached_prices(popular_tickers)
+        
+        # One batch of random draws and one timestamp for the whole request
+        draws = draw_signal_randoms(len(price_map))
+        timestamp = datetime.now().isoformat()
+        
+        for (ticker, price_data), signal_draws in zip(price_map.items(), draws):
             if 'error' not in price_data:
                 # Generate AI signal based on current price
-                ai_signal = generate_ai_signal(ticker, price_data['price'])
+                ai_signal = generate_ai_signal(ticker, price_data['price'], signal_draws, timestamp)
                 results[ticker] = ai_signal
             else:
                 results[ticker] = {
                     'symbol': ticker,
                     'error': price_data['error'],
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
         
         return jsonify({
             'popular_signals': results,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         }), 200
         
     except Exception as e:
@@ -176,30 +240,30 @@ def get_detailed_recommendation(ticker):
         
         # Enhance with more detailed recommendation
         detailed_recommendation = {
-            'symbol': ai_signal['symbol'],
-            'current_price': ai_signal['price'],
-            'signal': ai_signal['signal'],
-            'confidence': ai_signal['confidence'],
-            'short_term_outlook': 'bullish' if ai_signal['signal'] == 'buy' else 'bearish' if ai_signal['signal'] == 'sell' else 'neutral',
+            'symbol': ai_signal.symbol,
+            'current_price': ai_signal.price,
+            'signal': ai_signal.signal,
+            'confidence': ai_signal.confidence,
+            'short_term_outlook': 'bullish' if ai_signal.signal == 'buy' else 'bearish' if ai_signal.signal == 'sell' else 'neutral',
             'target_price': round(
-                ai_signal['price'] * (1 + (random.uniform(2, 8) / 100)) if ai_signal['signal'] == 'buy' 
-                else ai_signal['price'] * (1 - (random.uniform(2, 6) / 100)) if ai_signal['signal'] == 'sell' 
-                else ai_signal['price'], 2
+                ai_signal.price * (1 + (random.uniform(2, 8) / 100)) if ai_signal.signal == 'buy' 
+                else ai_signal.price * (1 - (random.uniform(2, 6) / 100)) if ai_signal.signal == 'sell' 
+                else ai_signal.price, 2
             ),
             'stop_loss': round(
-                ai_signal['price'] * (1 - (random.uniform(3, 7) / 100)) if ai_signal['signal'] == 'buy'
-                else ai_signal['price'] * (1 + (random.uniform(3, 7) / 100)) if ai_signal['signal'] == 'sell'
-                else ai_signal['price'], 2
+                ai_signal.price * (1 - (random.uniform(3, 7) / 100)) if ai_signal.signal == 'buy'
+                else ai_signal.price * (1 + (random.uniform(3, 7) / 100)) if ai_signal.signal == 'sell'
+                else ai_signal.price, 2
             ),
             'timeframe': 'short-term' if random.random() > 0.5 else 'medium-term',
-            'risk_level': 'medium' if ai_signal['indicators']['volatility'] < 2.5 else 'high',
-            'technical_analysis': ai_signal['recommendation'],
+            'risk_level': 'medium' if ai_signal.indicators.volatility < 2.5 else 'high',
+            'technical_analysis': ai_signal.recommendation,
             'fundamental_factors': [
-                'Market sentiment is positive' if ai_signal['signal'] == 'buy' else 
-                'Market sentiment is negative' if ai_signal['signal'] == 'sell' else 
+                'Market sentiment is positive' if ai_signal.signal == 'buy' else 
+                'Market sentiment is negative' if ai_signal.signal == 'sell' else 
                 'Market sentiment is neutral'
             ],
-            'timestamp': ai_signal['timestamp']
+            'timestamp': ai_signal.timestamp
         }
         
         return jsonify(detailed_recommendation), 200
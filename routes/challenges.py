@@ -1,10 +1,46 @@
 from flask import Blueprint, request, jsonify
-from models import User, UserChallenge, db
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.orm import selectinload
+from models import User, UserChallenge, Trade, ChallengeStats, db, refresh_challenge_stats
 from challenge_logic import update_challenge_status
+from services import leaderboard
+from routes.pagination import get_page_args, paginate
 
 challenges_bp = Blueprint('challenges', __name__)
 
 
+def insert_challenge(user_id, initial_balance, max_daily_loss, max_total_loss, profit_target):
+    """
+    Create and commit an active challenge with a Core INSERT ... RETURNING (skipping
+    the ORM unit of work) and return the new row. Responses should echo the balances
+    that were passed in: SQLite's RETURNING reports whole-number REALs as ints
+    """
+    challenge = db.session.execute(
+        insert(UserChallenge)
+        .values(
+            user_id=user_id,
+            initial_balance=initial_balance,
+            current_balance=initial_balance,
+            status='active',
+            max_daily_loss=max_daily_loss,
+            max_total_loss=max_total_loss,
+            profit_target=profit_target
+        )
+        .returning(
+            UserChallenge.id,
+            UserChallenge.initial_balance,
+            UserChallenge.current_balance,
+            UserChallenge.status,
+            UserChallenge.start_date
+        )
+    ).one()
+    # Core inserts skip the mapper events that keep challenge_stats current
+    refresh_challenge_stats(db.session.connection(), UserChallenge.id == challenge.id)
+    db.session.commit()
+    leaderboard.record_challenge(challenge)
+    return challenge
+
+
 @challenges_bp.route('/challenge/create', methods=['POST'])
 def create_challenge():
     try:
@@ -21,33 +57,29 @@ def create_challenge():
             return jsonify({'error': 'User not found'}), 404
         
         # Check if user already has an active challenge
-        existing_active_challenge = UserChallenge.query.filter_by(
-            user_id=user_id,
-            status='active'
-        ).first()
+        # SELECT EXISTS(...) stops at the first match and builds no ORM object
+        has_active_challenge = db.session.query(
+            UserChallenge.query.filter_by(user_id=user_id, status='active').exists()
+        ).scalar()
         
-        if existing_active_challenge:
+        if has_active_challenge:
             return jsonify({'error': 'User already has an active challenge'}), 409
         
         # Create new challenge with default values
-        challenge = UserChallenge(
+        initial_balance = 5000.0
+        challenge = insert_challenge(
             user_id=user_id,
-            initial_balance=5000.0,
-            current_balance=5000.0,
-            status='active',
+            initial_balance=initial_balance,
             max_daily_loss=5.0,  # Demo: maximum 5% daily loss (more lenient for demo)
             max_total_loss=10.0,  # Default: maximum 10% total loss
             profit_target=20.0  # Default: 20% profit target to become funded
         )
         
-        db.session.add(challenge)
-        db.session.commit()
-        
         return jsonify({
             'message': 'Challenge created successfully',
             'challenge_id': challenge.id,
-            'initial_balance': challenge.initial_balance,
-            'current_balance': challenge.current_balance,
+            'initial_balance': initial_balance,
+            'current_balance': initial_balance,
             'status': challenge.status,
             'start_date': challenge.start_date.isoformat()
         }), 201
@@ -60,12 +92,13 @@ def create_challenge():
 @challenges_bp.route('/challenge/<int:challenge_id>', methods=['GET'])
 def get_challenge(challenge_id):
     try:
-        challenge = UserChallenge.query.get(challenge_id)
+        # Load the trades with the challenge instead of lazily on first access
+        challenge = UserChallenge.query.options(selectinload(UserChallenge.trades)).filter_by(id=challenge_id).first()
         
         if not challenge:
             return jsonify({'error': 'Challenge not found'}), 404
         
-        # Prepare response with trades
+        # Prepare response with trades (app.json serializes datetimes to ISO-8601 itself)
         trades_list = []
         for trade in challenge.trades:
             trades_list.append({
@@ -73,7 +106,7 @@ def get_challenge(challenge_id):
                 'asset_name': trade.asset_name,
                 'entry_price': trade.entry_price,
                 'type': trade.type,
-                'timestamp': trade.timestamp.isoformat()
+                'timestamp': trade.timestamp
             })
         
         return jsonify({
@@ -112,10 +145,11 @@ def update_challenge_balance(challenge_id):
         # Update the balance
         challenge.current_balance = float(new_balance)
         
-        # Check and update the challenge status based on the new balance
-        update_challenge_status(challenge_id)
+        # Check and update the challenge status based on the new balance (reusing the loaded row)
+        update_challenge_status(challenge)
         
         db.session.commit()
+        leaderboard.record_challenge(challenge)
         
         return jsonify({
             'message': 'Balance updated successfully',
@@ -132,8 +166,12 @@ def update_challenge_balance(challenge_id):
 @challenges_bp.route('/user/<int:user_id>/challenges', methods=['GET'])
 def get_user_challenges(user_id):
     try:
-        challenges = UserChallenge.query.filter_by(user_id=user_id).all()
+        limit, after_id = get_page_args()
+        challenges, next_cursor = paginate(
+            UserChallenge.query.filter_by(user_id=user_id), UserChallenge.id, limit, after_id
+        )
         
+        # Dates are passed through as datetimes; the orjson provider formats them
         challenges_list = []
         for challenge in challenges:
             challenges_list.append({
@@ -141,8 +179,8 @@ def get_user_challenges(user_id):
                 'initial_balance': challenge.initial_balance,
                 'current_balance': challenge.current_balance,
                 'status': challenge.status,
-                'start_date': challenge.start_date.isoformat(),
-                'end_date': challenge.end_date.isoformat() if challenge.end_date else None,
+                'start_date': challenge.start_date,
+                'end_date': challenge.end_date,
                 'max_daily_loss': challenge.max_daily_loss,
                 'max_total_loss': challenge.max_total_loss,
                 'profit_target': challenge.profit_target
@@ -150,73 +188,74 @@ def get_user_challenges(user_id):
         
         return jsonify({
             'user_id': user_id,
-            'challenges': challenges_list
+            'challenges': challenges_list,
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# Exactly the columns the leaderboard needs, selected as plain rows (no ORM entities)
+LEADERBOARD_COLUMNS = (
+    ChallengeStats.challenge_id,
+    ChallengeStats.username,
+    ChallengeStats.profit_pct,
+    ChallengeStats.total_profit,
+    ChallengeStats.trade_count,
+    ChallengeStats.status
+)
+
+
+def leaderboard_entry(rank, stats):
+    """
+    Format one challenge_stats row for the leaderboard
+    """
+    return {
+        'rank': rank,
+        'username': stats.username,
+        'profit_percentage': round(stats.profit_pct, 2),
+        'total_profit': round(stats.total_profit, 2),
+        'challenge_status': stats.status,
+        'trades': stats.trade_count  # COUNT() result, never NULL
+    }
+
+
+def top_challenge_stats(criterion, priority):
+    """
+    Top challenge_stats rows by profit for one leaderboard tier, tagged with the tier's priority
+    """
+    top = select(*LEADERBOARD_COLUMNS).where(criterion) \
+        .order_by(ChallengeStats.profit_pct.desc()) \
+        .limit(leaderboard.LEADERBOARD_SIZE).subquery()
+    return select(top, literal(priority).label('priority'))
+
+
 @challenges_bp.route('/leaderboard', methods=['GET'])
 def get_leaderboard():
     try:
-        # SQL aggregation to get top 10 traders by profit percentage
-        from sqlalchemy import func
-        
-        # Calculate profit percentage for each user challenge
-        leaderboard_data = db.session.query(
-            User.username,
-            UserChallenge.initial_balance,
-            UserChallenge.current_balance,
-            UserChallenge.status,
-            func.count(Trade.id).label('trade_count'),
-            ((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).label('profit_percentage')
-        ).join(UserChallenge, User.id == UserChallenge.user_id) \
-         .outerjoin(Trade, UserChallenge.id == Trade.challenge_id) \
-         .filter(UserChallenge.status.in_(['funded', 'failed'])) \
-         .group_by(User.id, UserChallenge.id) \
-         .order_by(((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).desc()) \
-         .limit(10).all()
-        
-        leaderboard_list = []
-        for idx, (username, initial_balance, current_balance, status, trade_count, profit_percentage) in enumerate(leaderboard_data, 1):
-            total_profit = current_balance - initial_balance
-            leaderboard_list.append({
-                'rank': idx,
-                'username': username,
-                'profit_percentage': round(profit_percentage, 2),
-                'total_profit': round(total_profit, 2),
-                'challenge_status': status,
-                'trades': trade_count or 0
-            })
-        
-        # If we have less than 10, add some active challenges
-        if len(leaderboard_list) < 10:
-            remaining_spots = 10 - len(leaderboard_list)
-            active_challenges = db.session.query(
-                User.username,
-                UserChallenge.initial_balance,
-                UserChallenge.current_balance,
-                UserChallenge.status,
-                func.count(Trade.id).label('trade_count'),
-                ((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).label('profit_percentage')
-            ).join(UserChallenge, User.id == UserChallenge.user_id) \
-             .outerjoin(Trade, UserChallenge.id == Trade.challenge_id) \
-             .filter(UserChallenge.status == 'active') \
-             .group_by(User.id, UserChallenge.id) \
-             .order_by(((UserChallenge.current_balance - UserChallenge.initial_balance) / UserChallenge.initial_balance * 100).desc()) \
-             .limit(remaining_spots).all()
-            
-            for idx, (username, initial_balance, current_balance, status, trade_count, profit_percentage) in enumerate(active_challenges, len(leaderboard_list)+1):
-                total_profit = current_balance - initial_balance
-                leaderboard_list.append({
-                    'rank': idx,
-                    'username': username,
-                    'profit_percentage': round(profit_percentage, 2),
-                    'total_profit': round(total_profit, 2),
-                    'challenge_status': status,
-                    'trades': trade_count or 0
-                })
+        # Ranking comes from the Redis sorted sets when available; only the top 10 rows are read from SQL
+        challenge_ids = leaderboard.top_challenge_ids()
+        if challenge_ids is not None:
+            rows = db.session.execute(
+                select(*LEADERBOARD_COLUMNS).where(ChallengeStats.challenge_id.in_(challenge_ids))
+            ).all() if challenge_ids else []
+            rows_by_id = {row.challenge_id: row for row in rows}
+            leaderboard_data = [rows_by_id[challenge_id] for challenge_id in challenge_ids if challenge_id in rows_by_id]
+        else:
+            # Finished challenges rank ahead of active ones; each branch is an index-backed
+            # top-10, and one UNION ALL query replaces the separate "fill with active" query
+            ranked = union_all(
+                top_challenge_stats(ChallengeStats.status.in_(['funded', 'failed']), 0),
+                top_challenge_stats(ChallengeStats.status == 'active', 1)
+            ).subquery()
+            leaderboard_data = db.session.execute(
+                select(ranked)
+                .order_by(ranked.c.priority, ranked.c.profit_pct.desc())
+                .limit(leaderboard.LEADERBOARD_SIZE)
+            ).all()
+        
+        leaderboard_list = [leaderboard_entry(idx, row) for idx, row in enumerate(leaderboard_data, 1)]
         
         return jsonify({
             'leaderboard': leaderboard_list,
@@ -231,19 +270,26 @@ def get_leaderboard():
 @challenges_bp.route('/challenges', methods=['GET'])
 def get_all_challenges():
     try:
-        challenges = UserChallenge.query.all()
+        # Count trades in the same query rather than loading each challenge's trades
+        limit, after_id = get_page_args()
+        challenges, next_cursor = paginate(
+            db.session.query(UserChallenge, func.count(Trade.id))
+            .outerjoin(Trade, Trade.challenge_id == UserChallenge.id)
+            .group_by(UserChallenge.id),
+            UserChallenge.id, limit, after_id, row_id=lambda row: row[0].id
+        )
         
+        # Dates are passed through as datetimes; the orjson provider formats them
         challenges_list = []
-        for challenge in challenges:
-            trades_count = len(challenge.trades)
+        for challenge, trades_count in challenges:
             challenges_list.append({
                 'id': challenge.id,
                 'user_id': challenge.user_id,
                 'initial_balance': challenge.initial_balance,
                 'current_balance': challenge.current_balance,
                 'status': challenge.status,
-                'start_date': challenge.start_date.isoformat(),
-                'end_date': challenge.end_date.isoformat() if challenge.end_date else None,
+                'start_date': challenge.start_date,
+                'end_date': challenge.end_date,
                 'max_daily_loss': challenge.max_daily_loss,
                 'max_total_loss': challenge.max_total_loss,
                 'profit_target': challenge.profit_target,
@@ -252,7 +298,8 @@ def get_all_challenges():
         
         return jsonify({
             'challenges': challenges_list,
-            'total_challenges': len(challenges_list)
+            'total_challenges': len(challenges_list),
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -306,36 +353,25 @@ def purchase_challenge():
             return jsonify({'error': 'User not found'}), 404
         
         # Check if user already has an active challenge
-        existing_active_challenge = UserChallenge.query.filter_by(
-            user_id=user_id,
-            status='active'
-        ).first()
+        # SELECT EXISTS(...) stops at the first match and builds no ORM object
+        has_active_challenge = db.session.query(
+            UserChallenge.query.filter_by(user_id=user_id, status='active').exists()
+        ).scalar()
         
-        if existing_active_challenge:
+        if has_active_challenge:
             return jsonify({'error': 'User already has an active challenge'}), 409
         
         # Get plan configuration
         config = plan_config[plan_id]
         
         # Create new challenge with plan-specific values
-        challenge = UserChallenge(
-            user_id=user_id,
-            initial_balance=config['initial_balance'],
-            current_balance=config['initial_balance'],
-            status='active',
-            max_daily_loss=config['max_daily_loss'],
-            max_total_loss=config['max_total_loss'],
-            profit_target=config['profit_target']
-        )
-        
-        db.session.add(challenge)
-        db.session.commit()
+        challenge = insert_challenge(user_id=user_id, **config)
         
         return jsonify({
             'message': 'Challenge purchased successfully',
             'challenge_id': challenge.id,
-            'initial_balance': challenge.initial_balance,
-            'current_balance': challenge.current_balance,
+            'initial_balance': config['initial_balance'],
+            'current_balance': config['initial_balance'],
             'status': challenge.status,
             'start_date': challenge.start_date.isoformat()
         }), 200
@@ -0,0 +1,33 @@
+"""
+Keyset pagination for the listing endpoints (?limit=50&after_id=123)
+"""
+from flask import request
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def get_page_args():
+    """
+    Read limit (clamped to 1..MAX_PAGE_SIZE) and after_id from the query string
+    """
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    after_id = request.args.get('after_id', type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE)), after_id
+
+
+def paginate(query, id_column, limit, after_id, descending=False, row_id=lambda row: row.id):
+    """
+    Fetch one page of a query ordered by id_column, continuing after after_id.
+    row_id extracts the id from a result row. Returns (rows, next_cursor), where
+    next_cursor is None on the last page
+    """
+    if after_id is not None:
+        query = query.filter(id_column < after_id if descending else id_column > after_id)
+    rows = query.order_by(id_column.desc() if descending else id_column).limit(limit + 1).all()
+
+    # The extra row only tells us whether another page exists
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, row_id(rows[-1])
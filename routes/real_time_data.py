@@ -1,13 +1,15 @@
+import logging
 from flask import Blueprint, request, jsonify
-from real_time_data import get_cached_price, get_international_price
+from real_time_data import get_cached_price, get_cached_prices, get_international_price, MOROCCAN_SYMBOLS
 from services.morocco_scraper import get_morocco_stock_price
+from ticker_meta import TICKER_META, GENERIC_META
 # Import news service
 try:
     # Try importing from backend services
     import sys
     import os
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    backend_services_path = os.path.join(current_dir, '..', '..', 'backend', 'services')
+    backend_services_path = os.path.join(current_dir, '..', 'backend', 'services')
     sys.path.insert(0, backend_services_path)
     from news_service import news_service
 except ImportError:
@@ -46,6 +48,7 @@ except ImportError:
 get_moroccan_price = get_morocco_stock_price
 
 real_time_data_bp = Blueprint('real_time_data', __name__)
+logger = logging.getLogger(__name__)
 
 
 @real_time_data_bp.route('/api/price/<ticker>', methods=['GET'])
@@ -91,15 +94,13 @@ def get_multiple_prices():
             return jsonify({'error': 'Tickers list is required'}), 400
         
         tickers = data['tickers']
-        results = {}
-        
-        for ticker in tickers:
-            price_data = get_cached_price(ticker)
-            results[ticker] = price_data
+        # Cache misses are fetched concurrently rather than one after another
+        results = get_cached_prices(tickers)
         
         return jsonify({
             'prices': results,
-            'timestamp': get_cached_price(list(tickers)[0])['timestamp'] if tickers else None
+            # Reuse the first result rather than looking it up in the cache again
+            'timestamp': results[tickers[0]]['timestamp'] if tickers else None
         }), 200
         
     except Exception as e:
@@ -112,6 +113,7 @@ def get_financial_news():
     Get the latest financial news
     """
     try:
+        # NewsService caches its result (locally and in Redis) for NEWS_CACHE_TTL
         news_items = news_service.get_financial_news()
         return jsonify(news_items), 200
     except Exception as e:
@@ -124,8 +126,10 @@ def get_price_info(ticker):
     Get detailed information about a specific ticker
     """
     try:
+        symbol = ticker.upper()
+        
         # Get the price data
-        if ticker.upper() in ['IAM', 'ATW']:
+        if symbol in MOROCCAN_SYMBOLS:
             price_data = get_moroccan_price(ticker)
         else:
             price_data = get_international_price(ticker)
@@ -145,48 +149,7 @@ def get_price_info(ticker):
         }
         
         # Add specific details based on the stock
-        if ticker.upper() == 'AAPL':
-            info_data.update({
-                'company_name': 'Apple Inc.',
-                'exchange': 'NASDAQ',
-                'currency': 'USD',
-                'sector': 'Technology'
-            })
-        elif ticker.upper() == 'TSLA':
-            info_data.update({
-                'company_name': 'Tesla, Inc.',
-                'exchange': 'NASDAQ',
-                'currency': 'USD',
-                'sector': 'Automotive'
-            })
-        elif ticker.upper() == 'BTC-USD':
-            info_data.update({
-                'asset_name': 'Bitcoin',
-                'type': 'Cryptocurrency',
-                'currency': 'USD',
-                'market_cap_category': 'Crypto'
-            })
-        elif ticker.upper() == 'IAM':
-            info_data.update({
-                'company_name': 'Maroc Telecom',
-                'exchange': 'Casablanca Stock Exchange',
-                'currency': 'MAD',
-                'sector': 'Telecommunications'
-            })
-        elif ticker.upper() == 'ATW':
-            info_data.update({
-                'company_name': 'Attijariwafa Bank',
-                'exchange': 'Casablanca Stock Exchange',
-                'currency': 'MAD',
-                'sector': 'Banking'
-            })
-        else:
-            # Generic information
-            info_data.update({
-                'exchange': 'Unknown',
-                'currency': 'USD',
-                'sector': 'General'
-            })
+        info_data.update(TICKER_META.get(symbol, GENERIC_META))
         
         return jsonify(info_data), 200
         
@@ -1,8 +1,15 @@
+import logging
 from flask import Blueprint, request, jsonify
+from sqlalchemy import Text, case, cast, func, insert, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+import orjson
 from models import UserChallenge, Trade, db
-from challenge_logic import check_and_update_after_trade
+from challenge_logic import check_and_update_after_trade, schedule_status_update
+from routes.pagination import get_page_args, paginate
+from services import leaderboard
 
 trades_bp = Blueprint('trades', __name__)
+logger = logging.getLogger(__name__)
 
 
 @trades_bp.route('/trade/create', methods=['POST'])
@@ -15,11 +22,14 @@ def create_trade():
         
         challenge_id = data['challenge_id']
         asset_name = data['asset_name']
-        entry_price = data['entry_price']
+        entry_price = float(data['entry_price'])  # Converted once; raises ValueError for bad input
         trade_type = data['type'].lower()  # Convert to lowercase for consistency
         
         # Get quantity from request, default to 50 for demo purposes
-        quantity = data.get('quantity', 50)  # Default to 50 for demo, but allow frontend to override
+        try:
+            quantity = float(data.get('quantity', 50))  # Default to 50 for demo, but allow frontend to override
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Quantity must be a valid number'}), 400
         
         # Validate trade type
         if trade_type not in ['buy', 'sell']:
@@ -34,64 +44,81 @@ def create_trade():
         if challenge.status != 'active':
             return jsonify({'error': 'Cannot create trade for inactive challenge'}), 400
         
-        # Create new trade
-        trade = Trade(
-            challenge_id=challenge_id,
-            asset_name=asset_name,
-            entry_price=float(entry_price),
-            type=trade_type
-        )
-        
-        db.session.add(trade)
+        balance_before = challenge.current_balance
         
         # Calculate profit/loss and update challenge balance based on existing open positions
         # For demo purposes, we'll implement a simple system where each trade affects the balance
         # based on a fixed position size and price difference from the previous trade of opposite type
         
-        # Get all previous trades for this challenge sorted by timestamp
-        previous_trades = Trade.query.filter_by(challenge_id=challenge_id).order_by(Trade.timestamp.desc()).all()
-        
-        # For demo purposes, we'll implement a simple P&L calculation
-        # If this is a sell order, find the most recent buy for the same asset and calculate profit/loss
-        if trade_type == 'sell':
-            # Find most recent buy for this asset
-            for prev_trade in previous_trades:
-                if prev_trade.type == 'buy' and prev_trade.asset_name == asset_name:
-                    # Calculate profit/loss: (sell_price - buy_price) * quantity
-                    # Use the quantity passed from the frontend or the default set above
-                    # quantity is already defined above
-                    pnl = (float(entry_price) - prev_trade.entry_price) * quantity
-                    challenge.current_balance += pnl  # Add profit/loss to balance
-                    print(f"DEBUG: Sell trade P&L calculation: ({float(entry_price)} - {prev_trade.entry_price}) * {quantity} = {pnl}")
-                    print(f"DEBUG: Updated balance: {challenge.current_balance}")
-                    break
-        elif trade_type == 'buy':
-            # If this is a buy order, find the most recent sell for the same asset and calculate profit/loss
-            for prev_trade in previous_trades:
-                if prev_trade.type == 'sell' and prev_trade.asset_name == asset_name:
-                    # Calculate profit/loss: (buy_price - sell_price) * quantity (negative for loss when buying high after selling low)
-                    pnl = (prev_trade.entry_price - float(entry_price)) * quantity
-                    challenge.current_balance += pnl  # Add profit/loss to balance
-                    print(f"DEBUG: Buy trade P&L calculation: ({prev_trade.entry_price} - {float(entry_price)}) * {quantity} = {pnl}")
-                    print(f"DEBUG: Updated balance: {challenge.current_balance}")
-                    break
+        # Only the most recent opposite-type trade for the same asset matters, so fetch
+        # its entry price directly (one index seek) instead of the whole history
+        opposite_type = 'buy' if trade_type == 'sell' else 'sell'
+        prev_entry_price = db.session.query(Trade.entry_price).filter(
+            Trade.challenge_id == challenge_id,
+            Trade.asset_name == asset_name,
+            Trade.type == opposite_type
+        ).order_by(Trade.timestamp.desc()).limit(1).scalar()
         
-        db.session.commit()
+        if prev_entry_price is not None:
+            if trade_type == 'sell':
+                # Calculate profit/loss: (sell_price - buy_price) * quantity
+                # Use the quantity passed from the frontend or the default set above
+                pnl = (entry_price - prev_entry_price) * quantity
+                logger.debug("Sell trade P&L calculation: (%s - %s) * %s = %s",
+                             entry_price, prev_entry_price, quantity, pnl)
+            else:
+                # Calculate profit/loss: (buy_price - sell_price) * quantity (negative for loss when buying high after selling low)
+                pnl = (prev_entry_price - entry_price) * quantity
+                logger.debug("Buy trade P&L calculation: (%s - %s) * %s = %s",
+                             prev_entry_price, entry_price, quantity, pnl)
+            # Add profit/loss to balance in one atomic UPDATE, so concurrent trades on the
+            # same challenge can't overwrite each other's P&L
+            new_balance = db.session.execute(
+                update(UserChallenge)
+                .where(UserChallenge.id == challenge_id)
+                .values(current_balance=UserChallenge.current_balance + pnl)
+                .returning(UserChallenge.current_balance)
+            ).scalar_one()
+            balance_before = new_balance - pnl
+            logger.debug("Updated balance: %s", new_balance)
+        else:
+            pnl = 0.0
+            new_balance = balance_before
         
-        # Check and update challenge status after the trade
-        check_and_update_after_trade(trade)
+        # Create new trade with a Core INSERT ... RETURNING (no ORM unit of work for it);
+        # its running balance is the challenge balance once this trade's P&L is applied
+        trade = db.session.execute(
+            insert(Trade)
+            .values(
+                challenge_id=challenge_id,
+                asset_name=asset_name,
+                entry_price=entry_price,
+                type=trade_type,
+                running_balance=new_balance,
+                pnl=pnl
+            )
+            .returning(Trade.id, Trade.challenge_id, Trade.timestamp)
+        ).one()
         
-        return jsonify({
+        # Commit, then check and update challenge status after the trade (queued for the background
+        # worker by default, so challenge_status below may not reflect this trade yet)
+        status_pending = check_and_update_after_trade(trade, balance_before)
+        
+        response = jsonify({
             'message': 'Trade created successfully',
             'trade_id': trade.id,
             'challenge_id': trade.challenge_id,
-            'asset_name': trade.asset_name,
-            'entry_price': trade.entry_price,
-            'type': trade.type,
+            'asset_name': asset_name,
+            'entry_price': entry_price,
+            'type': trade_type,
             'timestamp': trade.timestamp.isoformat(),
             'current_balance': challenge.current_balance,
             'challenge_status': challenge.status
-        }), 201
+        })
+        # Tells clients the status check hasn't run yet and challenge_status may change
+        if status_pending:
+            response.headers['X-Status-Pending'] = 'true'
+        return response, 201
         
     except ValueError:
         return jsonify({'error': 'Entry price must be a valid number'}), 400
@@ -121,31 +148,75 @@ def get_trade(trade_id):
         return jsonify({'error': str(e)}), 500
 
 
+def challenge_trades_page(challenge_id, limit, after_id=None):
+    """
+    One page of a challenge's trades, newest first. PostgreSQL builds the array in SQL
+    (json_agg) and it is passed through as an orjson.Fragment; other databases return
+    dicts. Returns (trades, trades_count, next_cursor)
+    """
+    if db.engine.dialect.name != 'postgresql':
+        query = db.session.query(Trade.id, Trade.asset_name, Trade.entry_price, Trade.type, Trade.timestamp) \
+            .filter(Trade.challenge_id == challenge_id)
+        rows, next_cursor = paginate(query, Trade.id, limit, after_id, descending=True)
+        # Timestamps stay datetimes; the orjson provider formats them
+        trades = [{
+            'trade_id': row.id,
+            'asset_name': row.asset_name,
+            'entry_price': row.entry_price,
+            'type': row.type,
+            'timestamp': row.timestamp
+        } for row in rows]
+        return trades, len(trades), next_cursor
+    
+    criteria = [Trade.challenge_id == challenge_id]
+    if after_id is not None:
+        criteria.append(Trade.id < after_id)
+    
+    # One row past the page tells whether there is a next page
+    page = select(
+        Trade.id, Trade.asset_name, Trade.entry_price, Trade.type, Trade.timestamp,
+        func.row_number().over(order_by=Trade.id.desc()).label('row_number')
+    ).where(*criteria).order_by(Trade.id.desc()).limit(limit + 1).subquery()
+    in_page = page.c.row_number <= limit
+    timestamp = page.c.timestamp
+    
+    # Same text as datetime.isoformat(): the fraction is left out when it is zero
+    trade_json = func.json_build_object(
+        'trade_id', page.c.id,
+        'asset_name', page.c.asset_name,
+        'entry_price', page.c.entry_price,
+        'type', page.c.type,
+        'timestamp', func.concat(
+            func.to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS'),
+            case((func.date_trunc('second', timestamp) != timestamp, func.to_char(timestamp, '.US')), else_='')
+        )
+    )
+    # Cast to text so the driver hands back the JSON instead of parsing it
+    trades_array = cast(func.json_agg(aggregate_order_by(trade_json, page.c.id.desc())).filter(in_page), Text)
+    trades_json, rows, last_id = db.session.execute(
+        select(trades_array, func.count(), func.min(page.c.id).filter(in_page))
+    ).one()
+    
+    next_cursor = last_id if rows > limit else None
+    return orjson.Fragment(trades_json or '[]'), min(rows, limit), next_cursor
+
+
 @trades_bp.route('/challenge/<int:challenge_id>/trades', methods=['GET'])
 def get_challenge_trades(challenge_id):
     try:
         # Check if challenge exists
-        challenge = UserChallenge.query.get(challenge_id)
-        if not challenge:
+        if not db.session.query(UserChallenge.query.filter_by(id=challenge_id).exists()).scalar():
             return jsonify({'error': 'Challenge not found'}), 404
         
-        # Get all trades for this challenge
-        trades = Trade.query.filter_by(challenge_id=challenge_id).order_by(Trade.timestamp.desc()).all()
-        
-        trades_list = []
-        for trade in trades:
-            trades_list.append({
-                'trade_id': trade.id,
-                'asset_name': trade.asset_name,
-                'entry_price': trade.entry_price,
-                'type': trade.type,
-                'timestamp': trade.timestamp.isoformat()
-            })
+        # One page of trades for this challenge, newest first
+        limit, after_id = get_page_args()
+        trades, trades_count, next_cursor = challenge_trades_page(challenge_id, limit, after_id)
         
         return jsonify({
             'challenge_id': challenge_id,
-            'trades_count': len(trades_list),
-            'trades': trades_list
+            'trades_count': trades_count,
+            'trades': trades,
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
@@ -165,10 +236,17 @@ def delete_trade(trade_id):
         db.session.delete(trade)
         db.session.commit()
         
-        # After deleting a trade, we should recalculate the challenge status
-        # For simplicity, we'll just update the status based on the remaining trades/balance
-        from challenge_logic import update_challenge_status
-        update_challenge_status(challenge_id)
+        # The reversed P&L changed the balance, so re-score the challenge on the leaderboard
+        challenge = db.session.execute(
+            select(UserChallenge.id, UserChallenge.status, UserChallenge.current_balance, UserChallenge.initial_balance)
+            .where(UserChallenge.id == challenge_id)
+        ).first()
+        if challenge is not None:
+            leaderboard.record_challenge(challenge)
+        
+        # Deleting the trade also reverses its P&L (models.reverse_trade_pnl), so only the
+        # status thresholds need re-checking (queued when ASYNC_STATUS_UPDATES is on)
+        schedule_status_update(challenge_id)
         
         return jsonify({
             'message': 'Trade deleted successfully',
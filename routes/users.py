@@ -1,13 +1,63 @@
 from flask import Blueprint, request, jsonify
-from models import User, db
+from models import DUMMY_PASSWORD_HASH, User, UserChallenge, db, refresh_challenge_stats
+from routes.pagination import get_page_args, paginate
+from services import leaderboard
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 from werkzeug.security import check_password_hash
+import base64
+import binascii
+import orjson
+import os
 import re
+import time
 import jwt
-import datetime
-from flask import current_app
 
 users_bp = Blueprint('users', __name__)
 
+# Read and encoded once; PyJWT would otherwise re-encode a str key on every call
+SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here').encode('utf-8')
+
+EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+# Token lifetime in seconds; exp is issued as an integer Unix timestamp
+TOKEN_LIFETIME = 24 * 60 * 60
+
+# Statuses an admin can set on a challenge
+CHALLENGE_STATUSES = frozenset({'active', 'failed', 'funded'})
+
+
+def token_expired(token):
+    """
+    Read exp from the (unverified) payload segment so expired tokens are rejected
+    without an HMAC check. Malformed tokens return False and are left to jwt.decode
+    """
+    parts = token.split('.', 2)
+    if len(parts) != 3:
+        return False
+    try:
+        payload = parts[1]
+        exp = orjson.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))).get('exp')
+    except (binascii.Error, ValueError, AttributeError):
+        return False
+    return isinstance(exp, int) and exp < time.time()
+
+
+def duplicate_user_error(username, email):
+    """
+    409 response naming the field (username first) already taken by another user, or None.
+    One query served by the unique indexes on both columns
+    """
+    existing = db.session.query(User.username, User.email).filter(
+        or_(User.username == username, User.email == email)
+    ).limit(2).all()
+    if any(row.username == username for row in existing):
+        return jsonify({'error': 'Username already exists'}), 409
+    if existing:
+        return jsonify({'error': 'Email already exists'}), 409
+    return None
+
 
 @users_bp.route('/register', methods=['POST'])
 def register():
@@ -17,8 +67,7 @@ def register():
         if not data:
             # Fallback to manual parsing
             try:
-                import json
-                data = json.loads(request.get_data(as_text=True))
+                data = orjson.loads(request.get_data())
             except:
                 return jsonify({'error': 'Invalid JSON data'}), 400
         
@@ -31,40 +80,37 @@ def register():
         password = data['password']
         
         # Validate email format
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+        if '@' not in email or not EMAIL_RE.match(email):
             return jsonify({'error': 'Invalid email format'}), 400
         
         # Check if user already exists
-        if User.query.filter_by(username=username).first():
-            return jsonify({'error': 'Username already exists'}), 409
-        
-        if User.query.filter_by(email=email).first():
-            return jsonify({'error': 'Email already exists'}), 409
+        conflict = duplicate_user_error(username, email)
+        if conflict:
+            return conflict
         
         # Create new user
         user = User(username=username, email=email)
         user.set_password(password)
         
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent registration between the check and the insert
+            db.session.rollback()
+            return duplicate_user_error(username, email) or (jsonify({'error': 'User already exists'}), 409)
         
         # Generate JWT token
-        import os
-        secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
         token = jwt.encode({
             'user_id': user.id,
             'username': user.username,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)  # Token expires in 24 hours
-        }, secret_key, algorithm='HS256')
+            'exp': int(time.time()) + TOKEN_LIFETIME  # Token expires in 24 hours
+        }, SECRET_KEY, algorithm='HS256')
         
         return jsonify({
             'message': 'User registered successfully',
             'token': token,
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email
-            }
+            'user': user.to_dict()
         }), 201
         
     except Exception as e:
@@ -85,10 +131,14 @@ def get_profile():
             token = token[7:]
         
         try:
-            # Decode the token
-            import os
-            secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
-            data = jwt.decode(token, secret_key, algorithms=['HS256'])
+            # Expired tokens fail here without the signature check; a forged expired
+            # token gets the same 401 it would get from jwt.decode
+            if token_expired(token):
+                return jsonify({'error': 'Token has expired'}), 401
+            
+            # Decode the token; the same call verifies the signature and rejects
+            # tokens without an expiry or a user id
+            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'], options={'require': ['exp', 'user_id']})
             user_id = data['user_id']
             
             # Get user from database
@@ -98,11 +148,7 @@ def get_profile():
                 return jsonify({'error': 'User not found'}), 404
             
             return jsonify({
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email
-                }
+                'user': user.to_dict()
             }), 200
             
         except jwt.ExpiredSignatureError:
@@ -122,8 +168,7 @@ def login():
         if not data:
             # Fallback to manual parsing
             try:
-                import json
-                data = json.loads(request.get_data(as_text=True))
+                data = orjson.loads(request.get_data())
             except:
                 return jsonify({'error': 'Invalid JSON data'}), 400
         
@@ -135,26 +180,25 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if not user or not user.check_password(password):
+        if not user:
+            # Same hashing work as a wrong password, so unknown usernames aren't revealed by timing
+            check_password_hash(DUMMY_PASSWORD_HASH, password)
+            return jsonify({'error': 'Invalid credentials'}), 401
+        
+        if not user.check_password(password):
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Generate JWT token
-        import os
-        secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
         token = jwt.encode({
             'user_id': user.id,
             'username': user.username,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)  # Token expires in 24 hours
-        }, secret_key, algorithm='HS256')
+            'exp': int(time.time()) + TOKEN_LIFETIME  # Token expires in 24 hours
+        }, SECRET_KEY, algorithm='HS256')
         
         return jsonify({
             'message': 'Login successful',
             'token': token,
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email
-            }
+            'user': user.to_dict()
         }), 200
         
     except Exception as e:
@@ -179,37 +223,40 @@ def get_user(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+def admin_rows(user):
+    """
+    One admin panel row per challenge of user (a single row with empty challenge fields if none)
+    """
+    for challenge in user.challenges or (None,):
+        yield {
+            'user_id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'challenge_id': challenge.id if challenge else None,
+            'challenge_status': challenge.status if challenge else None,
+            'current_balance': challenge.current_balance if challenge else None,
+            'initial_balance': challenge.initial_balance if challenge else None,
+        }
+
+
 @users_bp.route('/admin', methods=['GET'])
 def get_admin_panel():
+    """
+    List users with their challenges, paginated by user id (?limit=&after_id=)
+    """
     try:
-        # Get all users with their challenge information
-        from models import UserChallenge
-        
-        users_data = db.session.query(
-            User.id,
-            User.username,
-            User.email,
-            UserChallenge.id.label('challenge_id'),
-            UserChallenge.status.label('challenge_status'),
-            UserChallenge.current_balance,
-            UserChallenge.initial_balance,
-        ).outerjoin(UserChallenge, User.id == UserChallenge.user_id).all()
-        
-        users_list = []
-        for user_data in users_data:
-            users_list.append({
-                'user_id': user_data.id,
-                'username': user_data.username,
-                'email': user_data.email,
-                'challenge_id': user_data.challenge_id,
-                'challenge_status': user_data.challenge_status,
-                'current_balance': user_data.current_balance,
-                'initial_balance': user_data.initial_balance,
-            })
+        limit, after_id = get_page_args()
+        # One page of users, each page's challenges loaded with one IN query
+        users, next_after_id = paginate(
+            User.query.options(selectinload(User.challenges)), User.id, limit, after_id
+        )
+        
+        users_list = [row for user in users for row in admin_rows(user)]
         
         return jsonify({
             'users': users_list,
-            'total_users': len(users_list)
+            'total_users': len(users),
+            'next_after_id': next_after_id
         }), 200
         
     except Exception as e:
@@ -219,8 +266,6 @@ def get_admin_panel():
 @users_bp.route('/admin/user/<int:user_id>/update-status', methods=['PUT'])
 def update_user_status(user_id):
     try:
-        from models import UserChallenge
-        
         data = request.get_json()
         
         if not data or 'status' not in data:
@@ -229,18 +274,25 @@ def update_user_status(user_id):
         new_status = data['status']
         
         # Validate status
-        if new_status not in ['active', 'failed', 'funded']:
+        if not isinstance(new_status, str) or new_status not in CHALLENGE_STATUSES:
             return jsonify({'error': 'Invalid status. Must be active, failed, or funded'}), 400
         
-        # Find user's challenge
-        challenge = UserChallenge.query.filter_by(user_id=user_id).first()
+        # Update the status of the user's (first) challenge in one UPDATE ... RETURNING
+        first_challenge_id = select(func.min(UserChallenge.id)).where(UserChallenge.user_id == user_id).scalar_subquery()
+        challenge = db.session.execute(
+            update(UserChallenge)
+            .where(UserChallenge.id == first_challenge_id)
+            .values(status=new_status)
+            .returning(UserChallenge.id, UserChallenge.status, UserChallenge.current_balance, UserChallenge.initial_balance)
+        ).first()
         
         if not challenge:
             return jsonify({'error': 'User does not have a challenge'}), 404
         
-        # Update the challenge status
-        challenge.status = new_status
+        # Bulk UPDATEs skip the mapper events that keep challenge_stats current
+        refresh_challenge_stats(db.session.connection(), UserChallenge.id == challenge.id)
         db.session.commit()
+        leaderboard.record_challenge(challenge)
         
         return jsonify({
             'message': 'User status updated successfully',
@@ -9,6 +9,7 @@ Key Functions:
 - update_challenge_status: Evaluates and updates challenge status based on performance
 - calculate_daily_change: Calculates daily performance metrics
 - calculate_total_change: Calculates overall challenge performance
+- get_trade_aggregates: Scores trades and sums their P&L in one SQL query
 
 Business Rules:
 - Daily loss > 5% → Challenge status becomes 'failed'
@@ -17,9 +18,20 @@ Business Rules:
 - Otherwise → Status remains 'active'
 """
 
+import logging
 from datetime import datetime, timedelta
+from sqlalchemy import case, func, select
 from models import UserChallenge, Trade, db
 
+logger = logging.getLogger(__name__)
+
+
+def start_of_utc_day():
+    """
+    Midnight of the current UTC day as a naive datetime, matching the trade timestamps
+    """
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
 
 def update_challenge_status(challenge_id):
     """
@@ -34,7 +46,7 @@ def update_challenge_status(challenge_id):
     # Get the challenge from the database
     challenge = UserChallenge.query.get(challenge_id)
     if not challenge:
-        print(f"DEBUG: Challenge {challenge_id} not found")
+        logger.debug("Challenge %s not found", challenge_id)
         return False
     
     # Calculate total change percentage from initial balance
@@ -43,26 +55,27 @@ def update_challenge_status(challenge_id):
     # Calculate daily change percentage (performance since start of day)
     daily_loss_percentage = calculate_daily_change(challenge)
     
-    print(f"DEBUG: Challenge {challenge_id} - Current balance: {challenge.current_balance}, Initial balance: {challenge.initial_balance}")
-    print(f"DEBUG: Total change percentage: {total_change_percentage}, Max total loss: {challenge.max_total_loss}")
-    print(f"DEBUG: Daily loss percentage: {daily_loss_percentage}, Max daily loss: {challenge.max_daily_loss}")
+    logger.debug("Challenge %s - Current balance: %s, Initial balance: %s",
+                 challenge_id, challenge.current_balance, challenge.initial_balance)
+    logger.debug("Total change percentage: %s, Max total loss: %s", total_change_percentage, challenge.max_total_loss)
+    logger.debug("Daily loss percentage: %s, Max daily loss: %s", daily_loss_percentage, challenge.max_daily_loss)
     
     # Apply the rules based on challenge parameters
     if daily_loss_percentage < -challenge.max_daily_loss:  # Daily loss > max_daily_loss%
         challenge.status = 'failed'
         challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} failed due to daily loss")
+        logger.debug("Challenge %s failed due to daily loss", challenge_id)
     elif total_change_percentage < -challenge.max_total_loss:  # Total loss > max_total_loss%
         challenge.status = 'failed'
         challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} failed due to total loss")
+        logger.debug("Challenge %s failed due to total loss", challenge_id)
     elif total_change_percentage >= challenge.profit_target:  # Profit reaches profit_target%
         challenge.status = 'funded'
         challenge.end_date = datetime.utcnow()
-        print(f"DEBUG: Challenge {challenge_id} funded due to profit target")
+        logger.debug("Challenge %s funded due to profit target", challenge_id)
     # Otherwise, status remains 'active'
     else:
-        print(f"DEBUG: Challenge {challenge_id} status remains active")
+        logger.debug("Challenge %s status remains active", challenge_id)
     
     # Commit the changes to the database
     db.session.commit()
@@ -70,64 +83,79 @@ def update_challenge_status(challenge_id):
     return True
 
 
-def calculate_daily_change(challenge):
+def get_trade_aggregates(challenge_id, start_of_day):
+    """
+    Scores every trade of a challenge against the most recent earlier trade of the
+    opposite type for the same asset, and aggregates the result in one query.
+    
+    Args:
+        challenge_id (int): The ID of the challenge
+        start_of_day (datetime): Start of the day whose trades count as today's
+        
+    Returns:
+        Row: total_trades, winning_trades, today_trades and today_pnl
+    """
+    order = (Trade.timestamp, Trade.id)
+    
+    # A running count of buys (sells) per asset starts a new group at every buy (sell),
+    # so each group opens with the latest buy (sell) at or before its rows
+    numbered = select(
+        Trade.id,
+        Trade.asset_name,
+        Trade.type,
+        Trade.entry_price,
+        Trade.timestamp,
+        func.count(case((Trade.type == 'buy', 1))).over(partition_by=Trade.asset_name, order_by=order).label('buy_group'),
+        func.count(case((Trade.type == 'sell', 1))).over(partition_by=Trade.asset_name, order_by=order).label('sell_group')
+    ).where(Trade.challenge_id == challenge_id).subquery()
+    
+    group_order = (numbered.c.timestamp, numbered.c.id)
+    last_buy_price = func.first_value(numbered.c.entry_price).over(
+        partition_by=(numbered.c.asset_name, numbered.c.buy_group), order_by=group_order
+    )
+    last_sell_price = func.first_value(numbered.c.entry_price).over(
+        partition_by=(numbered.c.asset_name, numbered.c.sell_group), order_by=group_order
+    )
+    
+    # P&L against the previous opposite trade; NULL when there is none
+    paired = select(
+        numbered.c.timestamp,
+        case(
+            ((numbered.c.type == 'sell') & (numbered.c.buy_group > 0), (numbered.c.entry_price - last_buy_price) * 10),
+            ((numbered.c.type == 'buy') & (numbered.c.sell_group > 0), (last_sell_price - numbered.c.entry_price) * 10)
+        ).label('pnl')  # Assuming default quantity of 10
+    ).subquery()
+    
+    is_today = paired.c.timestamp >= start_of_day
+    return db.session.execute(select(
+        func.count().label('total_trades'),
+        func.coalesce(func.sum(case((paired.c.pnl > 0, 1), else_=0)), 0).label('winning_trades'),
+        func.coalesce(func.sum(case((is_today, 1), else_=0)), 0).label('today_trades'),
+        func.coalesce(func.sum(case((is_today, paired.c.pnl), else_=0.0)), 0.0).label('today_pnl')
+    )).one()
+
+
+def calculate_daily_change(challenge, aggregates=None):
     """
     Calculates the daily change percentage for a challenge.
     
     Args:
         challenge (UserChallenge): The challenge object
+        aggregates (Row, optional): get_trade_aggregates() for today, if the caller already has it
         
     Returns:
         float: Daily change percentage (positive for gain, negative for loss)
     """
-    # Get today's trades for this challenge
-    today = datetime.utcnow().date()
-    start_of_day = datetime.combine(today, datetime.min.time())
-    
-    # Get all trades for this challenge from the start of today
-    daily_trades = Trade.query.filter(
-        Trade.challenge_id == challenge.id,
-        Trade.timestamp >= start_of_day
-    ).order_by(Trade.timestamp.asc()).all()
+    if aggregates is None:
+        aggregates = get_trade_aggregates(challenge.id, start_of_utc_day())
     
     # If no trades today, daily change is 0
-    if not daily_trades:
+    if not aggregates.today_trades:
         return 0.0
     
     # Calculate the opening balance at the start of the day
-    # We need to find the balance at the start of the day
-    # For simplicity, we'll calculate based on the current balance and today's trades
-    opening_balance = challenge.current_balance
-    
-    # Calculate the impact of today's trades to get the opening balance
-    for trade in daily_trades:
-        # Find the most recent opposite trade for the same asset to calculate P&L
-        if trade.type == 'sell':
-            # Find the most recent buy for the same asset
-            prev_buy = Trade.query.filter(
-                Trade.challenge_id == challenge.id,
-                Trade.asset_name == trade.asset_name,
-                Trade.type == 'buy',
-                Trade.timestamp < trade.timestamp
-            ).order_by(Trade.timestamp.desc()).first()
-            
-            if prev_buy:
-                # Subtract the P&L of this trade from the balance to get previous balance
-                pnl = (trade.entry_price - prev_buy.entry_price) * 10  # Assuming default quantity of 10
-                opening_balance -= pnl
-        elif trade.type == 'buy':
-            # Find the most recent sell for the same asset
-            prev_sell = Trade.query.filter(
-                Trade.challenge_id == challenge.id,
-                Trade.asset_name == trade.asset_name,
-                Trade.type == 'sell',
-                Trade.timestamp < trade.timestamp
-            ).order_by(Trade.timestamp.desc()).first()
-            
-            if prev_sell:
-                # Subtract the P&L of this trade from the balance to get previous balance
-                pnl = (prev_sell.entry_price - trade.entry_price) * 10  # Assuming default quantity of 10
-                opening_balance -= pnl
+    # For simplicity, we'll calculate based on the current balance and the P&L of today's trades
+    opening_balance = challenge.current_balance - aggregates.today_pnl
     
     # Calculate daily change percentage
     if opening_balance == 0:
@@ -168,37 +196,14 @@ def get_challenge_performance_metrics(challenge_id):
     if not challenge:
         return None
     
+    # Trade counts, wins and today's P&L come back from a single aggregate query
+    aggregates = get_trade_aggregates(challenge.id, start_of_utc_day())
+    
     total_change = calculate_total_change(challenge)
-    daily_change = calculate_daily_change(challenge)
-    
-    # Count total trades
-    total_trades = Trade.query.filter_by(challenge_id=challenge.id).count()
-    
-    # Count winning trades (simplified calculation)
-    winning_trades = 0
-    trades = Trade.query.filter_by(challenge_id=challenge.id).order_by(Trade.timestamp.asc()).all()
-    
-    for i, trade in enumerate(trades):
-        if trade.type == 'sell':
-            # Find the most recent buy for the same asset
-            prev_buy = None
-            for j in range(i-1, -1, -1):
-                if trades[j].asset_name == trade.asset_name and trades[j].type == 'buy':
-                    prev_buy = trades[j]
-                    break
-            
-            if prev_buy and trade.entry_price > prev_buy.entry_price:
-                winning_trades += 1
-        elif trade.type == 'buy':
-            # Find the most recent sell for the same asset
-            prev_sell = None
-            for j in range(i-1, -1, -1):
-                if trades[j].asset_name == trade.asset_name and trades[j].type == 'sell':
-                    prev_sell = trades[j]
-                    break
-            
-            if prev_sell and prev_sell.entry_price > trade.entry_price:
-                winning_trades += 1
+    daily_change = calculate_daily_change(challenge, aggregates)
+    
+    total_trades = aggregates.total_trades
+    winning_trades = aggregates.winning_trades
     
     return {
         'challenge_id': challenge.id,
@@ -0,0 +1,109 @@
+"""
+Leaderboard Service
+===================
+
+Keeps the challenge ranking in Redis sorted sets so /leaderboard doesn't have to
+aggregate every challenge on each request.
+
+Keys:
+- leaderboard:finished - funded/failed challenges, scored by profit percentage
+- leaderboard:active   - active challenges, scored by profit percentage
+- leaderboard:ready    - set once the sorted sets have been built from the database
+
+Writers call record_challenge() after committing a balance or status change.
+When Redis is not configured (or unreachable) the functions return None and the
+route falls back to SQL.
+"""
+
+import logging
+from models import UserChallenge, db
+from services.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+FINISHED_KEY = 'leaderboard:finished'
+ACTIVE_KEY = 'leaderboard:active'
+READY_KEY = 'leaderboard:ready'
+LEADERBOARD_SIZE = 10
+
+
+def profit_percentage(current_balance, initial_balance):
+    """
+    Profit of a challenge as a percentage of its initial balance
+    """
+    if not initial_balance:
+        return 0.0
+    return (current_balance - initial_balance) / initial_balance * 100
+
+
+def _add_to_pipeline(pipe, challenge):
+    """
+    Queue the commands that place one challenge in the right sorted set
+    """
+    member = str(challenge.id)
+    score = profit_percentage(challenge.current_balance, challenge.initial_balance)
+    if challenge.status in ('funded', 'failed'):
+        pipe.zadd(FINISHED_KEY, {member: score})
+        pipe.zrem(ACTIVE_KEY, member)
+    elif challenge.status == 'active':
+        pipe.zadd(ACTIVE_KEY, {member: score})
+        pipe.zrem(FINISHED_KEY, member)
+    else:
+        pipe.zrem(FINISHED_KEY, member)
+        pipe.zrem(ACTIVE_KEY, member)
+
+
+def record_challenge(challenge):
+    """
+    Update a challenge's leaderboard entry (anything with id, status,
+    current_balance and initial_balance, e.g. a UserChallenge or a result row)
+    """
+    if redis_client is None:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        _add_to_pipeline(pipe, challenge)
+        pipe.execute()
+    except Exception as e:
+        logger.debug(f"Redis leaderboard update failed for challenge {challenge.id}: {str(e)}")
+
+
+def rebuild():
+    """
+    Load every challenge into the sorted sets (first run, or after Redis lost its data)
+    """
+    challenges = db.session.execute(
+        db.select(
+            UserChallenge.id,
+            UserChallenge.status,
+            UserChallenge.current_balance,
+            UserChallenge.initial_balance
+        )
+    ).all()
+
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(FINISHED_KEY, ACTIVE_KEY)
+    for challenge in challenges:
+        _add_to_pipeline(pipe, challenge)
+    pipe.set(READY_KEY, 1)
+    pipe.execute()
+
+
+def top_challenge_ids(limit=LEADERBOARD_SIZE):
+    """
+    Ids of the top challenges in leaderboard order: finished ones by profit, then
+    active ones to fill the remaining spots. Returns None when Redis can't be used
+    """
+    if redis_client is None:
+        return None
+    try:
+        if not redis_client.exists(READY_KEY):
+            rebuild()
+
+        ids = [int(member) for member in redis_client.zrevrange(FINISHED_KEY, 0, limit - 1)]
+        if len(ids) < limit:
+            ids += [int(member) for member in redis_client.zrevrange(ACTIVE_KEY, 0, limit - len(ids) - 1)]
+        return ids
+    except Exception as e:
+        logger.debug(f"Redis leaderboard read failed: {str(e)}")
+        return None
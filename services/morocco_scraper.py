@@ -7,7 +7,7 @@ It specifically targets stocks like IAM and ATW from the Casablanca Stock Exchan
 
 Data Source:
 - Website: bourse.ma (official Moroccan stock exchange website)
-- Method: Web scraping using BeautifulSoup
+- Method: Web scraping using selectolax (lexbor, a C HTML parser)
 - Frequency: Real-time requests to get latest prices
 
 Note: This is a demo implementation. In production, consider using official APIs
@@ -19,12 +19,34 @@ Key Features:
 - Returns standardized price data format
 """
 
-import requests
-from bs4 import BeautifulSoup
+import threading
 import time
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 import re
 
+# requests and selectolax are only needed for live scraping, so they are imported
+# (and the pooled session created) on first use rather than at app start-up
+session = None
+session_lock = threading.Lock()
+
+# Caps concurrent requests to the exchange's site in get_multiple_morocco_stocks
+MAX_SCRAPER_WORKERS = 8
+scraper_executor = ThreadPoolExecutor(max_workers=MAX_SCRAPER_WORKERS, thread_name_prefix='morocco-scraper')
+
+# Lookups of the same ticker within a few seconds reuse the last successful result
+SCRAPER_CACHE_TTL = 5
+scraper_cache = TTLCache(maxsize=1024, ttl=SCRAPER_CACHE_TTL)
+scraper_cache_lock = threading.Lock()
+
+# Patterns for the placeholder extractors, compiled once
+PRICE_RE = re.compile(r'[\d,]+\.?\d*')
+CHANGE_RE = re.compile(r'[+-]?\d+\.?\d*')
+CHANGE_PERCENT_RE = re.compile(r'(?P<percent>[+-]?\d+\.?\d*)%')
+VOLUME_RE = re.compile(r'(?P<digits>\d{1,3}(?:[.,]\d{3})*)(?:\s*(?P<unit>[KMB]))?')
+VOLUME_MULTIPLIERS = {'K': 1000, 'M': 1000000, 'B': 1000000000}
+
 
 def get_morocco_stock_price(ticker):
     """
@@ -36,6 +58,13 @@ def get_morocco_stock_price(ticker):
     Returns:
         dict: Dictionary containing price data or error information
     """
+    symbol = ticker.upper()
+    with scraper_cache_lock:
+        cached = scraper_cache.get(symbol)
+    if cached is not None:
+        # Copy so callers can't modify the cached entry
+        return dict(cached)
+    
     # Define the base URL for the Moroccan stock exchange
     base_url = "https://www.bourse.ma"
     
@@ -68,9 +97,29 @@ def get_morocco_stock_price(ticker):
         result['error'] = f'Error scraping Moroccan stock data: {str(e)}'
         print(f"Scraping error for {ticker}: {str(e)}")
     
+    # Errors aren't cached, so the next lookup tries again
+    if result['error'] is None:
+        with scraper_cache_lock:
+            scraper_cache[symbol] = dict(result)
+    
     return result
 
 
+def get_session():
+    """
+    Returns the pooled session used for bourse.ma, so requests reuse keep-alive connections
+    """
+    global session
+    with session_lock:
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+        return session
+
+
 def get_mock_morocco_data(ticker):
     """
     Returns mock data for Moroccan stocks (for demo purposes).
@@ -122,6 +171,9 @@ def get_real_morocco_stock_price(ticker):
     Returns:
         dict: Dictionary containing price data or error information
     """
+    import requests
+    from selectolax.lexbor import LexborHTMLParser
+    
     # Standardized response format
     result = {
         'symbol': ticker.upper(),
@@ -138,38 +190,24 @@ def get_real_morocco_stock_price(ticker):
         # Define the base URL for the Moroccan stock exchange
         base_url = "https://www.bourse.ma"
         
-        # Make the request with appropriate headers to avoid being blocked
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
         # Construct the URL to get stock information
         # Note: The actual URL structure may vary and would need to be determined
         # by examining the bourse.ma website structure
-        response = requests.get(base_url, headers=headers, timeout=10)
+        # The session sends browser-like headers to avoid being blocked
+        response = get_session().get(base_url, timeout=10)
         response.raise_for_status()
         
-        # Parse the HTML content
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Parse the HTML content once; the extractors below work on the matched node
+        tree = LexborHTMLParser(response.content)
         
         # Look for stock information based on ticker
         # This is a simplified example - actual implementation would depend on website structure
-        stock_element = find_stock_element(soup, ticker)
+        stock_element = find_stock_element(tree, ticker)
         
         if stock_element:
             # Extract price information
-            price = extract_price_from_element(stock_element)
-            change = extract_change_from_element(stock_element)
-            change_percent = extract_change_percent_from_element(stock_element)
-            volume = extract_volume_from_element(stock_element)
-            
-            result.update({
-                'price': price,
-                'change': change,
-                'change_percent': change_percent,
-                'volume': volume,
-                'timestamp': time.time()
-            })
+            result.update(extract_stock_fields(stock_element))
+            result['timestamp'] = time.time()
         else:
             result['error'] = f'Stock {ticker} not found on the website'
             
@@ -181,112 +219,150 @@ def get_real_morocco_stock_price(ticker):
     return result
 
 
-def find_stock_element(soup, ticker):
+def find_stock_element(tree, ticker):
     """
     Helper function to find the HTML element containing stock information.
     This would need to be customized based on the actual website structure.
     
     Args:
-        soup (BeautifulSoup): Parsed HTML content
+        tree (selectolax LexborHTMLParser): Parsed HTML content
         ticker (str): Stock ticker symbol
         
     Returns:
-        BeautifulSoup element or None
+        LexborNode or None
     """
     # This is a placeholder implementation
     # In reality, you would search for elements containing the ticker symbol
     # and the associated price information
     
     # Look for elements that might contain the stock data
-    # This could be table rows, divs, or other elements
-    elements = soup.find_all(['tr', 'div', 'span'], text=re.compile(ticker, re.IGNORECASE))
+    # This could be table rows, divs, or other elements; like BeautifulSoup's
+    # text= filter, only the element's own text is matched, not its descendants'
+    pattern = re.compile(ticker, re.IGNORECASE)
+    for element in tree.css('tr, div, span'):
+        if pattern.search(element.text(deep=False)):
+            return element
     
-    # Return the first matching element or None
-    return elements[0] if elements else None
+    return None
 
 
-def extract_price_from_element(element):
+def extract_stock_fields(element):
     """
-    Extracts price from a BeautifulSoup element.
+    Extracts price, change, change percentage and volume from a parsed HTML node,
+    reading the node's text only once.
     
     Args:
-        element: BeautifulSoup element containing price information
+        element: Parsed HTML node containing stock information
         
     Returns:
-        float: Price value or None
+        dict: price, change, change_percent and volume (each None when not found)
+    """
+    text = element.text()
+    return {
+        'price': parse_price(text),
+        'change': parse_change(text),
+        'change_percent': parse_change_percent(text),
+        'volume': parse_volume(text)
+    }
+
+
+def parse_price(text):
+    """
+    Parses the first price (a number with an optional decimal point) in text, or None
     """
     # This is a placeholder implementation
     # In reality, you would search for price patterns within the element
-    text = element.get_text()
-    
-    # Look for price patterns (numbers with optional decimal points)
-    price_match = re.search(r'[\d,]+\.?\d*', text.replace(',', ''))
+    price_match = PRICE_RE.search(text.replace(',', ''))
     if price_match:
         return float(price_match.group())
     return None
 
 
+def parse_change(text):
+    """
+    Parses the first signed change value in text, or None
+    """
+    # Placeholder implementation
+    change_match = CHANGE_RE.search(text)
+    if change_match:
+        return float(change_match.group())
+    return None
+
+
+def parse_change_percent(text):
+    """
+    Parses the first percentage (e.g. '-0.2%') in text, or None
+    """
+    # Placeholder implementation
+    percent_match = CHANGE_PERCENT_RE.search(text)
+    if percent_match:
+        return float(percent_match.group('percent'))
+    return None
+
+
+def parse_volume(text):
+    """
+    Parses the first volume in text, expanding K/M/B abbreviations, or None
+    """
+    # Placeholder implementation
+    volume_match = VOLUME_RE.search(text)
+    if volume_match:
+        volume = int(volume_match.group('digits').replace(',', '').replace('.', ''))
+        # Convert abbreviated volumes (K, M, B) to full numbers
+        return volume * VOLUME_MULTIPLIERS.get(volume_match.group('unit'), 1)
+    return None
+
+
+def extract_price_from_element(element):
+    """
+    Extracts price from a parsed HTML node.
+    
+    Args:
+        element: Parsed HTML node containing price information
+        
+    Returns:
+        float: Price value or None
+    """
+    return parse_price(element.text())
+
+
 def extract_change_from_element(element):
     """
-    Extracts change value from a BeautifulSoup element.
+    Extracts change value from a parsed HTML node.
     
     Args:
-        element: BeautifulSoup element containing change information
+        element: Parsed HTML node containing change information
         
     Returns:
         float: Change value or None
     """
-    # Placeholder implementation
-    text = element.get_text()
-    change_match = re.search(r'[+-]?\d+\.?\d*', text)
-    if change_match:
-        return float(change_match.group())
-    return None
+    return parse_change(element.text())
 
 
 def extract_change_percent_from_element(element):
     """
-    Extracts change percentage from a BeautifulSoup element.
+    Extracts change percentage from a parsed HTML node.
     
     Args:
-        element: BeautifulSoup element containing change percentage information
+        element: Parsed HTML node containing change percentage information
         
     Returns:
         float: Change percentage or None
     """
-    # Placeholder implementation
-    text = element.get_text()
-    percent_match = re.search(r'[+-]?\d+\.?\d*%', text)
-    if percent_match:
-        return float(percent_match.group().replace('%', ''))
-    return None
+    return parse_change_percent(element.text())
 
 
 def extract_volume_from_element(element):
     """
-    Extracts volume from a BeautifulSoup element.
+    Extracts volume from a parsed HTML node.
     
     Args:
-        element: BeautifulSoup element containing volume information
+        element: Parsed HTML node containing volume information
         
     Returns:
         int: Volume value or None
     """
-    # Placeholder implementation
-    text = element.get_text()
-    volume_match = re.search(r'\d{1,3}(?:[.,]\d{3})*(?:\s*(?:K|M|B))?', text)
-    if volume_match:
-        volume_str = volume_match.group()
-        # Convert abbreviated volumes (K, M, B) to full numbers
-        if 'K' in volume_str:
-            return int(float(volume_str.replace('K', '').replace(',', '').replace('.', '')) * 1000)
-        elif 'M' in volume_str:
-            return int(float(volume_str.replace('M', '').replace(',', '').replace('.', '')) * 1000000)
-        elif 'B' in volume_str:
-            return int(float(volume_str.replace('B', '').replace(',', '').replace('.', '')) * 1000000000)
-        else:
-            return int(volume_str.replace(',', '').replace('.', ''))
-    return None
+    return parse_volume(element.text())
 
 
 def get_multiple_morocco_stocks(tickers):
@@ -299,14 +375,9 @@ def get_multiple_morocco_stocks(tickers):
     Returns:
         dict: Dictionary with ticker symbols as keys and price data as values
     """
-    results = {}
-    
-    for ticker in tickers:
-        results[ticker] = get_morocco_stock_price(ticker)
-        # Add a small delay to be respectful to the server
-        time.sleep(0.1)
-    
-    return results
+    # Fetched concurrently, so the batch takes about as long as the slowest ticker;
+    # the bounded pool keeps the load on the server limited
+    return dict(zip(tickers, scraper_executor.map(get_morocco_stock_price, tickers)))
 
 
 # For demo purposes, here's how you would use this service:
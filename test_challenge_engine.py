@@ -0,0 +1,99 @@
+"""
+Regression test for services.challenge_engine.get_trade_aggregates: the SQL window
+query must score trades exactly like a plain scan that pairs each trade with the
+last earlier trade of the opposite type for the same asset.
+
+Run with `python test_challenge_engine.py` (or pytest); it uses a throwaway SQLite database.
+"""
+import os
+import random
+import tempfile
+from datetime import timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + tempfile.mkstemp(suffix='.db')[1]
+os.environ.setdefault('ENABLE_REALTIME', '0')
+os.environ.setdefault('ASYNC_STATUS_UPDATES', '0')
+
+from app import app
+from models import db, User, UserChallenge, Trade
+from services.challenge_engine import get_trade_aggregates, start_of_utc_day
+
+
+def scan_aggregates(trades, start_of_day):
+    """
+    Reference implementation: walk the trades in (timestamp, id) order, remembering
+    the last buy and sell price per asset (P&L assumes a quantity of 10)
+    """
+    last_buy = {}
+    last_sell = {}
+    total_trades = winning_trades = today_trades = 0
+    today_pnl = 0.0
+    for trade in sorted(trades, key=lambda t: (t.timestamp, t.id)):
+        pnl = None
+        if trade.type == 'sell':
+            if trade.asset_name in last_buy:
+                pnl = (trade.entry_price - last_buy[trade.asset_name]) * 10
+            last_sell[trade.asset_name] = trade.entry_price
+        elif trade.type == 'buy':
+            if trade.asset_name in last_sell:
+                pnl = (last_sell[trade.asset_name] - trade.entry_price) * 10
+            last_buy[trade.asset_name] = trade.entry_price
+
+        total_trades += 1
+        if pnl is not None and pnl > 0:
+            winning_trades += 1
+        if trade.timestamp >= start_of_day:
+            today_trades += 1
+            today_pnl += pnl or 0.0
+    return total_trades, winning_trades, today_trades, today_pnl
+
+
+def make_challenge(username):
+    user = User(username=username, email=f'{username}@example.com')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.flush()
+    challenge = UserChallenge(user_id=user.id)
+    db.session.add(challenge)
+    db.session.commit()
+    return challenge
+
+
+def assert_matches_scan(challenge_id, start_of_day):
+    trades = Trade.query.filter_by(challenge_id=challenge_id).all()
+    expected = scan_aggregates(trades, start_of_day)
+    row = get_trade_aggregates(challenge_id, start_of_day)
+    assert (row.total_trades, row.winning_trades, row.today_trades) == expected[:3], (tuple(row), expected)
+    assert abs(row.today_pnl - expected[3]) < 1e-6, (row.today_pnl, expected[3])
+
+
+def test_aggregates_match_scan():
+    with app.app_context():
+        rng = random.Random(42)
+        start_of_day = start_of_utc_day()
+        for seed in range(20):
+            challenge = make_challenge(f'engine{seed}')
+            # Minute resolution over two days gives same-timestamp ties (ordered by id)
+            for _ in range(rng.randint(1, 60)):
+                db.session.add(Trade(
+                    challenge_id=challenge.id,
+                    asset_name=rng.choice(('AAPL', 'TSLA', 'BTC-USD')),
+                    type=rng.choice(('buy', 'sell')),
+                    entry_price=round(rng.uniform(1, 200), 2),
+                    timestamp=start_of_day + timedelta(minutes=rng.randint(-24 * 60, 12 * 60) // 30 * 30)
+                ))
+            db.session.commit()
+            assert_matches_scan(challenge.id, start_of_day)
+
+
+def test_aggregates_without_trades():
+    with app.app_context():
+        challenge = make_challenge('engine_empty')
+        row = get_trade_aggregates(challenge.id, start_of_utc_day())
+        assert tuple(row) == (0, 0, 0, 0.0)
+
+
+if __name__ == '__main__':
+    test_aggregates_match_scan()
+    test_aggregates_without_trades()
+    print('challenge engine aggregates match the reference scan')
@@ -0,0 +1,100 @@
+"""
+Regression test for challenge_logic.update_challenge_statuses: the batch UPDATE must
+give every challenge the same status as update_challenge_status run on it alone.
+
+Run with `python test_challenge_status.py` (or pytest); it uses a throwaway SQLite database.
+"""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + tempfile.mkstemp(suffix='.db')[1]
+os.environ.setdefault('ENABLE_REALTIME', '0')
+os.environ['ASYNC_STATUS_UPDATES'] = '0'
+
+from app import app
+from models import db, User, UserChallenge, Trade, DailyBalanceSnapshot
+from challenge_logic import start_of_utc_day, update_challenge_status, update_challenge_statuses
+
+# name: (current_balance, day open snapshot, last trade, starting status, expected status)
+# Balances are against the default 5000 initial balance and 2% / 10% / 20% limits
+CASES = {
+    'no_snapshot_traded_today': (4850.0, None, 'today', 'active', 'failed'),  # -3% vs initial balance
+    'snapshot_traded_today': (5050.0, 5200.0, 'today', 'active', 'failed'),  # -2.9% vs snapshot, +1% overall
+    'snapshot_small_move': (4950.0, 5000.0, 'today', 'active', 'active'),
+    'no_trades_today': (4700.0, None, 'yesterday', 'active', 'active'),  # Daily loss only counts after a trade today
+    'no_trades': (4700.0, None, None, 'active', 'active'),
+    'total_loss': (4400.0, None, 'yesterday', 'active', 'failed'),
+    'funded': (6100.0, None, 'today', 'active', 'funded'),
+    'already_failed': (6100.0, None, 'today', 'failed', 'failed'),
+}
+
+
+def make_challenges(user_id, specs):
+    """
+    Insert one challenge per (current_balance, snapshot, last_trade, status) spec; returns their ids
+    """
+    start_of_day = start_of_utc_day()
+    ids = []
+    for current_balance, snapshot, last_trade, status in specs:
+        challenge = UserChallenge(user_id=user_id, current_balance=current_balance, status=status)
+        db.session.add(challenge)
+        db.session.flush()
+        if last_trade is not None:
+            timestamp = datetime.utcnow() if last_trade == 'today' else start_of_day - timedelta(hours=3)
+            db.session.add(Trade(challenge_id=challenge.id, asset_name='AAPL', type='buy', entry_price=100.0, timestamp=timestamp))
+        if snapshot is not None:
+            db.session.add(DailyBalanceSnapshot(challenge_id=challenge.id, date=start_of_day.date(), open_balance=snapshot))
+        ids.append(challenge.id)
+    db.session.commit()
+    return ids
+
+
+def single_and_batch_statuses(specs):
+    """
+    Build two identical sets of challenges, update one challenge by challenge and the
+    other in one batch, and return both lists of resulting statuses
+    """
+    user = User(username=f'status{User.query.count()}', email=f'status{User.query.count()}@example.com')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+
+    single_ids = make_challenges(user.id, specs)
+    batch_ids = make_challenges(user.id, specs)
+    for challenge_id in single_ids:
+        update_challenge_status(challenge_id)
+    update_challenge_statuses(batch_ids)
+
+    db.session.expire_all()
+    statuses = lambda ids: [db.session.get(UserChallenge, challenge_id).status for challenge_id in ids]
+    return statuses(single_ids), statuses(batch_ids)
+
+
+def test_batch_matches_single_on_edge_cases():
+    with app.app_context():
+        specs = [case[:4] for case in CASES.values()]
+        single, batch = single_and_batch_statuses(specs)
+        expected = [case[4] for case in CASES.values()]
+        assert single == expected, dict(zip(CASES, single))
+        assert batch == expected, dict(zip(CASES, batch))
+
+
+def test_batch_matches_single_on_random_challenges():
+    with app.app_context():
+        rng = random.Random(7)
+        specs = [(
+            rng.choice((3000.0, 4400.0, 4850.0, 4950.0, 5000.0, 5200.0, 6100.0)),
+            rng.choice((None, 5000.0, 5100.0, 4700.0)),
+            rng.choice(('today', 'today', 'yesterday', None)),
+            rng.choice(('active',) * 5 + ('failed',))
+        ) for _ in range(60)]
+        single, batch = single_and_batch_statuses(specs)
+        assert single == batch, [(spec, s, b) for spec, s, b in zip(specs, single, batch) if s != b]
+
+
+if __name__ == '__main__':
+    test_batch_matches_single_on_edge_cases()
+    test_batch_matches_single_on_random_challenges()
+    print('batch and single challenge status updates agree')
@@ -0,0 +1,43 @@
+"""
+Static ticker details shared by the root and backend /api/price/<ticker>/info routes
+"""
+
+TICKER_META = {
+    'AAPL': {
+        'company_name': 'Apple Inc.',
+        'exchange': 'NASDAQ',
+        'currency': 'USD',
+        'sector': 'Technology'
+    },
+    'TSLA': {
+        'company_name': 'Tesla, Inc.',
+        'exchange': 'NASDAQ',
+        'currency': 'USD',
+        'sector': 'Automotive'
+    },
+    'BTC-USD': {
+        'asset_name': 'Bitcoin',
+        'type': 'Cryptocurrency',
+        'currency': 'USD',
+        'market_cap_category': 'Crypto'
+    },
+    'IAM': {
+        'company_name': 'Maroc Telecom',
+        'exchange': 'Casablanca Stock Exchange',
+        'currency': 'MAD',
+        'sector': 'Telecommunications'
+    },
+    'ATW': {
+        'company_name': 'Attijariwafa Bank',
+        'exchange': 'Casablanca Stock Exchange',
+        'currency': 'MAD',
+        'sector': 'Banking'
+    }
+}
+
+# Generic information for any other ticker
+GENERIC_META = {
+    'exchange': 'Unknown',
+    'currency': 'USD',
+    'sector': 'General'
+}
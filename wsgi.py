@@ -1,12 +1,26 @@
 """
 WSGI entry point for Railway deployment
+Run with: gunicorn -c gunicorn_conf.py wsgi:application
 """
+# gevent must patch the standard library before anything else imports sockets
+from gevent import monkey
+monkey.patch_all()
+
 import os
-from app import create_app
 
-# Create the Flask app instance
-application = create_app()
+# Let psycopg2 yield to other greenlets while waiting on PostgreSQL
+if (os.environ.get('DATABASE_URL') or '').startswith(('postgres://', 'postgresql://')):
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+from app import app
+
+# Gunicorn looks up "application" (see render.yaml)
+application = app
 
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5000))
-    application.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    application.run(host='0.0.0.0', port=port, debug=False)